@@ -10,7 +10,7 @@ import soundfile as sf
 import pyaudio
 import threading
 import time
-from pythonosc import dispatcher
+from pythonosc import dispatcher, udp_client
 from pythonosc.osc_server import ThreadingOSCUDPServer
 from typing import Dict, Optional, Tuple
 from pathlib import Path
@@ -66,12 +66,17 @@ class StemPlayer:
         self.playing = False
         self.position = int(start_pos * buffer.frames) if buffer.loaded else 0
         self.original_position = self.position
+        self.frac_position = float(self.position)  # Read position when rate != 1.0
+        self._ramp = np.zeros(0)
         
     def get_audio_chunk(self, chunk_size: int) -> np.ndarray:
         """Get next audio chunk for playback"""
         if not self.buffer.loaded or not self.playing:
             return np.zeros((chunk_size, 2), dtype=np.float32)
         
+        if self.rate != 1.0:
+            return self._get_varispeed_chunk(chunk_size)
+        
         output = np.zeros((chunk_size, 2), dtype=np.float32)
         samples_needed = chunk_size
         output_pos = 0
@@ -106,7 +111,39 @@ class StemPlayer:
             output_pos += to_read
             samples_needed -= to_read
         
+        self.frac_position = float(self.position)
         return output
+    
+    def _get_varispeed_chunk(self, chunk_size: int) -> np.ndarray:
+        """Play at self.rate like PlayBuf: an interpolated indexed read, no FFT in the audio loop"""
+        frames = self.buffer.frames
+        if len(self._ramp) != chunk_size:
+            self._ramp = np.arange(chunk_size, dtype=np.float64)
+        
+        positions = self.frac_position + self._ramp * self.rate
+        valid = None
+        if self.loop:
+            positions %= frames
+        else:
+            valid = (positions >= 0) & (positions < frames)
+            np.clip(positions, 0, frames - 1, out=positions)
+        index = positions.astype(np.intp)
+        frac = (positions - index)[:, None].astype(np.float32)
+        next_index = index + 1
+        next_index[next_index >= frames] = 0 if self.loop else frames - 1
+        
+        # Linear interpolation between neighbouring frames, silent past the end
+        data = self.buffer.audio_data
+        output = data[index] * (1.0 - frac) + data[next_index] * frac
+        if valid is not None:
+            output[~valid] = 0.0
+        output *= self.volume
+        
+        self.frac_position += chunk_size * self.rate
+        if self.loop:
+            self.frac_position %= frames
+        self.position = min(max(int(self.frac_position), 0), frames)
+        return output.astype(np.float32, copy=False)
 
 class PythonAudioServer:
     """Main audio server class - Python replacement for SuperCollider"""
@@ -210,9 +247,17 @@ class PythonAudioServer:
         
         # Play stem
         disp.map("/play_stem", self.osc_play_stem)
+        disp.map("/play_section", self.osc_play_section)
         
         # Stop stem
         disp.map("/stop_stem", self.osc_stop_stem)
+        disp.map("/stop_all_stems", self.osc_stop_all_stems)
+        
+        # Free a single buffer
+        disp.map("/free_buffer", self.osc_free_buffer)
+        
+        # Load completion handshake (buffers load synchronously here)
+        disp.map("/sync", self.osc_sync, needs_reply_address=True)
         
         # Volume control
         disp.map("/stem_volume", self.osc_stem_volume)
@@ -300,6 +345,12 @@ class PythonAudioServer:
         except Exception as e:
             print(f"❌ Error playing stem: {e}")
     
+    def osc_play_section(self, address, *args):
+        """Play a whole section - /play_section [ids..., rates..., volumes...]"""
+        n = len(args) // 3
+        for buffer_id, rate, volume in zip(args[:n], args[n:2 * n], args[2 * n:3 * n]):
+            self.osc_play_stem("/play_stem", buffer_id, rate, volume)
+    
     def osc_stop_stem(self, address, *args):
         """Stop stem playback"""
         try:
@@ -311,6 +362,35 @@ class PythonAudioServer:
         except Exception as e:
             print(f"❌ Error stopping stem: {e}")
     
+    def osc_stop_all_stems(self, address, *args):
+        """Stop every stem but keep buffers loaded for reuse"""
+        for player in self.active_players.values():
+            player.playing = False
+        self.active_players.clear()
+        print("⏹️  Stopped all stems")
+    
+    def osc_free_buffer(self, address, *args):
+        """Free one buffer - /free_buffer [buffer_id]"""
+        try:
+            buffer_id = int(args[0])
+            if buffer_id in self.active_players:
+                self.active_players[buffer_id].playing = False
+                del self.active_players[buffer_id]
+            if buffer_id in self.buffers:
+                del self.buffers[buffer_id]
+                print(f"Freed buffer {buffer_id}")
+        except Exception as e:
+            print(f"❌ Error freeing buffer: {e}")
+    
+    def osc_sync(self, client_address, address, *args):
+        """Reply /synced [sync_id] to the sender's reply port - /sync [sync_id, reply_port]"""
+        try:
+            sync_id = int(args[0])
+            reply_port = int(args[1])
+            udp_client.SimpleUDPClient(client_address[0], reply_port).send_message("/synced", [sync_id])
+        except Exception as e:
+            print(f"❌ Error answering sync: {e}")
+    
     def osc_stem_volume(self, address, *args):
         """Set stem volume"""
         try:
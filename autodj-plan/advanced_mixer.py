@@ -6,36 +6,102 @@ Advanced Real-time Music Mixing Engine with Key Detection and Enhanced Features
 import json
 import os
 import random
-from typing import Dict, List, Tuple, Optional, Any
-from dataclasses import dataclass
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, FrozenSet, List, Tuple, Optional, Any
+from dataclasses import dataclass, field
 from pathlib import Path
 import numpy as np
 
-@dataclass 
+# orjson parses structure files several times faster than the stdlib
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Numba JIT-compiles the batch BPM kernels; plain NumPy is used without it
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    
+    def njit(*args, **kwargs):
+        def decorator(func):
+            return func
+        return decorator
+
+@dataclass(slots=True)
 class Song:
     name: str
     bpm: int
-    beats: List[float]
-    downbeats: List[float] 
+    beats: np.ndarray = field(compare=False)
+    downbeats: np.ndarray = field(compare=False)
     segments: List[Dict[str, Any]]
     stems_path: str
     key: Optional[str] = None  # We'll estimate this
+    stem_files: Dict[str, str] = field(init=False, repr=False, compare=False)
+    display_name: str = field(init=False, repr=False, compare=False)
+    _segments_by_label: Dict[str, List[Dict[str, Any]]] = field(init=False, repr=False, compare=False)
+    _label_set: FrozenSet[str] = field(init=False, repr=False, compare=False)
     
-    @property
-    def stem_files(self) -> Dict[str, str]:
-        stems_dir = Path(self.stems_path)
-        stems = {}
-        for stem_file in stems_dir.glob("*.wav"):
-            stem_type = stem_file.stem
-            stems[stem_type] = str(stem_file)
-        return stems
+    def __post_init__(self):
+        # Sorted float32 arrays so beat lookups can use np.searchsorted
+        self.beats = np.sort(np.asarray(self.beats, dtype=np.float32))
+        self.downbeats = np.sort(np.asarray(self.downbeats, dtype=np.float32))
+        # Scan the stems directory once instead of on every access
+        # Stem types and segment labels are interned so the many dict/set
+        # lookups during stem selection can resolve by identity
+        self.stem_files = {
+            sys.intern(stem_file.stem): str(stem_file)
+            for stem_file in Path(self.stems_path).glob("*.wav")
+        }
+        self.display_name = self.name.split("(", 1)[0].strip()
+        # Group segments by label once so section lookups are dict hits
+        self._segments_by_label = {}
+        for seg in self.segments:
+            label = seg['label'] = sys.intern(seg['label'])
+            self._segments_by_label.setdefault(label, []).append(seg)
+        self._label_set = frozenset(self._segments_by_label)
     
     def get_segments_by_type(self, segment_type: str) -> List[Dict[str, Any]]:
-        return [seg for seg in self.segments if seg['label'] == segment_type]
+        return self._segments_by_label.get(segment_type, [])
     
     @property 
     def available_sections(self) -> List[str]:
-        return list(set(seg['label'] for seg in self.segments))
+        return list(self._label_set)
+
+def _build_compatibility_map(camelot_wheel: Dict[str, str],
+                             camelot_to_key: Dict[str, str]) -> Dict[str, FrozenSet[str]]:
+    """Precompute harmonically compatible keys for every key on the Camelot wheel"""
+    compatible_map = {}
+    for key, camelot in camelot_wheel.items():
+        number = int(camelot[:-1])
+        letter = camelot[-1]
+        
+        compatible_camelot = []
+        compatible_camelot.append(camelot)
+        
+        # Adjacent numbers (±1)
+        for adj in [-1, 1]:
+            adj_num = (number + adj - 1) % 12 + 1
+            compatible_camelot.append(f"{adj_num}{letter}")
+        
+        # Relative major/minor
+        opposite_letter = 'A' if letter == 'B' else 'B'
+        compatible_camelot.append(f"{number}{opposite_letter}")
+        
+        # Perfect 5th (±7 positions)
+        fifth_up = (number + 6) % 12 + 1
+        fifth_down = (number - 8) % 12 + 1
+        compatible_camelot.extend([f"{fifth_up}{letter}", f"{fifth_down}{letter}"])
+        
+        compatible_map[key] = frozenset(
+            camelot_to_key[camelot_key] for camelot_key in compatible_camelot
+            if camelot_key in camelot_to_key
+        )
+    return compatible_map
 
 class KeyCompatibility:
     CAMELOT_WHEEL = {
@@ -47,6 +113,9 @@ class KeyCompatibility:
     
     CAMELOT_TO_KEY = {v: k for k, v in CAMELOT_WHEEL.items()}
     
+    # The wheel is static, so compatibility is computed once per key
+    _COMPATIBLE = _build_compatibility_map(CAMELOT_WHEEL, CAMELOT_TO_KEY)
+    
     # Simple key estimation based on BPM and song characteristics
     KEY_ESTIMATION = {
         67: 'Am',   # Wasted Love - emotional ballad
@@ -69,40 +138,33 @@ class KeyCompatibility:
     
     @classmethod
     def get_compatible_keys(cls, key: str) -> List[str]:
-        if key not in cls.CAMELOT_WHEEL:
-            return [key]
-            
-        camelot = cls.CAMELOT_WHEEL[key]
-        number = int(camelot[:-1])
-        letter = camelot[-1]
-        
-        compatible_camelot = []
-        compatible_camelot.append(camelot)
-        
-        # Adjacent numbers (±1)
-        for adj in [-1, 1]:
-            adj_num = (number + adj - 1) % 12 + 1
-            compatible_camelot.append(f"{adj_num}{letter}")
-        
-        # Relative major/minor
-        opposite_letter = 'A' if letter == 'B' else 'B'
-        compatible_camelot.append(f"{number}{opposite_letter}")
-        
-        # Perfect 5th (±7 positions)
-        fifth_up = (number + 6) % 12 + 1
-        fifth_down = (number - 8) % 12 + 1
-        compatible_camelot.extend([f"{fifth_up}{letter}", f"{fifth_down}{letter}"])
-        
-        compatible_keys = []
-        for camelot_key in compatible_camelot:
-            if camelot_key in cls.CAMELOT_TO_KEY:
-                compatible_keys.append(cls.CAMELOT_TO_KEY[camelot_key])
-        
-        return list(set(compatible_keys))
+        return list(cls._COMPATIBLE.get(key, (key,)))
+    
+    @classmethod
+    def are_compatible(cls, key1: str, key2: str) -> bool:
+        """O(1) check whether key2 mixes harmonically with key1"""
+        return key2 in cls._COMPATIBLE.get(key1, (key1,))
+
+@njit(cache=True)
+def bpm_compat_mask(ref_bpm, other_bpms, tolerance_percent):
+    """Boolean mask of BPMs within tolerance_percent of ref_bpm"""
+    # Bounds are fixed for the reference, so this is a plain range check
+    tolerance = ref_bpm * (tolerance_percent / 100.0)
+    lo = ref_bpm - tolerance
+    hi = ref_bpm + tolerance
+    return (other_bpms >= lo) & (other_bpms <= hi)
+
+@njit(cache=True)
+def pitch_shifts(source_bpms, target_bpm):
+    """Pitch shift ratios needed to bring each source BPM to target_bpm"""
+    return target_bpm / source_bpms
 
 class BPMTolerance:
     @staticmethod
     def is_compatible(bpm1: int, bpm2: int, tolerance_percent: float = 8.0) -> bool:
+        # Batch query: compare bpm1 against a whole array of BPMs
+        if isinstance(bpm2, np.ndarray):
+            return bpm_compat_mask(bpm1, bpm2, tolerance_percent)
         # Increased tolerance for more mixing possibilities
         tolerance = bpm1 * (tolerance_percent / 100)
         return abs(bpm1 - bpm2) <= tolerance
@@ -110,6 +172,8 @@ class BPMTolerance:
     @staticmethod
     def calculate_pitch_shift(source_bpm: int, target_bpm: int) -> float:
         """Calculate pitch shift ratio needed"""
+        if isinstance(source_bpm, np.ndarray):
+            return pitch_shifts(source_bpm, target_bpm)
         return target_bpm / source_bpm
     
     @staticmethod
@@ -117,22 +181,100 @@ class BPMTolerance:
         """Get tempo variants (half-time, double-time, etc.)"""
         return [bpm // 2, bpm, bpm * 2]
 
+# Sections that can be adapted from any song, even one without that label
+ADAPTABLE_SECTIONS = frozenset({"intro", "outro", "bridge"})
+
+# Song ordering used per stem type for each theme strategy. Orderings name
+# pre-sorted views of the song pool built by AdvancedMusicMixer._order_pool;
+# "pool" keeps the reference song first, followed by the compatible songs.
+STEM_PREFERENCES = {
+    # Prefer higher BPM songs for drums, keep vocals consistent
+    "high_energy": {
+        "drums": "bpm_desc",
+        "bass": "bpm_desc",
+        "vocals": "pool",
+        "piano": "pool",
+        "other": "bpm_desc"
+    },
+    # Prefer lower BPM, more consistent selection
+    "smooth": {
+        "drums": "bpm_asc",
+        "bass": "bpm_asc",
+        "vocals": "pool",
+        "piano": "bpm_asc",
+        "other": "pool"
+    },
+    # Mix high and low, create dynamic contrasts
+    "emotional": {
+        "drums": "pool",
+        "bass": "bpm_asc",
+        "vocals": "near_120",
+        "piano": "pool",
+        "other": "pool"
+    }
+}
+
+# Remix recipes: reference tempo, section layout and stem strategy per theme
+REMIX_THEMES = {
+    "energetic": {
+        "preferred_bpm": 140,
+        "structure": ["intro", "verse", "chorus", "verse", "bridge", "chorus", "chorus", "outro"],
+        "stem_strategy": "high_energy"
+    },
+    "chill": {
+        "preferred_bpm": 95,
+        "structure": ["intro", "verse", "chorus", "verse", "solo", "chorus", "outro"],
+        "stem_strategy": "smooth"
+    },
+    "dramatic": {
+        "preferred_bpm": 125,
+        "structure": ["verse", "verse", "chorus", "bridge", "bridge", "chorus", "chorus"],
+        "stem_strategy": "emotional"
+    }
+}
+
+def _read_structure(json_file: Path) -> Dict[str, Any]:
+    """Read and parse a single song structure JSON file"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(json_file.read_bytes())
+    with open(json_file, 'r') as f:
+        return json.load(f)
+
+def _json_numpy_default(obj: Any) -> Any:
+    """json.dump fallback for arrays and NumPy scalars, like OPT_SERIALIZE_NUMPY"""
+    if isinstance(obj, (np.ndarray, np.generic)):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def dump_remix_plan(remix_plan: Dict[str, Any], path: str):
+    """Write a remix plan to a JSON file (orjson when available)"""
+    if ORJSON_AVAILABLE:
+        Path(path).write_bytes(
+            orjson.dumps(remix_plan, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY)
+        )
+        return
+    with open(path, 'w') as f:
+        json.dump(remix_plan, f, indent=2, default=_json_numpy_default)
+
 class AdvancedMusicMixer:
     def __init__(self, stems_dir: str, structures_dir: str):
         self.stems_dir = stems_dir
         self.structures_dir = structures_dir
         self.songs: Dict[str, Song] = {}
         self.load_songs()
-        self.estimate_keys()
     
     def load_songs(self):
         structures_path = Path(self.structures_dir)
         stems_path = Path(self.stems_dir)
         
-        for json_file in structures_path.glob("*.json"):
-            with open(json_file, 'r') as f:
-                data = json.load(f)
-            
+        # Structure files are independent, so read and parse them concurrently
+        json_files = list(structures_path.glob("*.json"))
+        parsed = []
+        if json_files:
+            with ThreadPoolExecutor(max_workers=min(32, len(json_files))) as executor:
+                parsed = list(executor.map(_read_structure, json_files))
+        
+        for json_file, data in zip(json_files, parsed):
             song_name = json_file.stem
             song_stems_dir = stems_path / song_name
             
@@ -143,66 +285,104 @@ class AdvancedMusicMixer:
                     beats=data['beats'],
                     downbeats=data['downbeats'],
                     segments=data['segments'],
-                    stems_path=str(song_stems_dir)
+                    stems_path=str(song_stems_dir),
+                    # Keys are estimated in the same pass as loading
+                    key=KeyCompatibility.estimate_key(data['bpm'])
                 )
                 self.songs[song_name] = song
-                print(f"Loaded: {song_name} (BPM: {song.bpm})")
+                print(f"Loaded: {song_name} (BPM: {song.bpm}, Estimated key: {song.key})")
+        
+        # Parallel BPM array for vectorized distance/compatibility queries
+        self._song_list: List[Song] = list(self.songs.values())
+        self._bpms = np.fromiter((s.bpm for s in self._song_list), dtype=np.float64,
+                                 count=len(self._song_list))
+        self._song_index = {song.name: idx for idx, song in enumerate(self._song_list)}
+        # Library listing rows (bpm, formatted bpm, display name, key), in BPM order
+        self._song_display: List[Tuple[int, str, str, str]] = [
+            (s.bpm, f"{s.bpm:3d}", s.display_name, s.key)
+            for s in sorted(self._song_list, key=lambda s: s.bpm)
+        ]
+        self._build_key_compat_matrix()
+    
+    @property
+    def song_listing(self) -> List[Tuple[int, str, str, str]]:
+        """Library listing rows (bpm, formatted bpm, display name, key), in BPM order"""
+        return self._song_display
     
     def estimate_keys(self):
-        """Estimate keys for all songs"""
+        """Re-estimate keys for all songs (load_songs already estimates them)"""
         for song in self.songs.values():
             song.key = KeyCompatibility.estimate_key(song.bpm)
             print(f"Estimated key for {song.name}: {song.key}")
+        self._build_key_compat_matrix()
+    
+    def _build_key_compat_matrix(self):
+        """Precompute pairwise key compatibility (N×N bool) for the library"""
+        key_index: Dict[Optional[str], int] = {}
+        for song in self._song_list:
+            key_index.setdefault(song.key, len(key_index))
+        keys = list(key_index)
+        compat_table = np.array(
+            [[KeyCompatibility.are_compatible(k1, k2) for k2 in keys] for k1 in keys],
+            dtype=bool
+        ).reshape(len(keys), len(keys))
+        self._key_idx = np.fromiter((key_index[s.key] for s in self._song_list),
+                                    dtype=np.intp, count=len(self._song_list))
+        self._key_compat_matrix = compat_table[self._key_idx][:, self._key_idx]
+        
+        # Compatibility results depend on the keys, so drop any memoized ones
+        self._compatible_cache: Dict[Tuple[str, Optional[str], float], List[Tuple[Song, int]]] = {}
+        self._pool_cache: Dict[str, Tuple[List[Song], Dict[str, List[Song]]]] = {}
+    
+    def find_compatible_songs(self, base_song: Song, key: Optional[str] = None,
+                              tolerance_percent: float = 15.0) -> List[Tuple[Song, int]]:
+        """(song, BPM difference) for songs within BPM tolerance of base_song
+        whose key mixes with key (memoized)"""
+        if key is None:
+            key = base_song.key
+        cache_key = (base_song.name, key, tolerance_percent)
+        
+        compatible = self._compatible_cache.get(cache_key)
+        if compatible is None:
+            base_idx = self._song_index.get(base_song.name)
+            bpm_mask = BPMTolerance.is_compatible(base_song.bpm, self._bpms,
+                                                  tolerance_percent=tolerance_percent)
+            if base_idx is not None and key == base_song.key:
+                key_mask = self._key_compat_matrix[base_idx]
+            else:
+                key_mask = np.fromiter((KeyCompatibility.are_compatible(key, s.key)
+                                        for s in self._song_list),
+                                       dtype=bool, count=len(self._song_list))
+            mask = bpm_mask & key_mask
+            if base_idx is not None:
+                mask[base_idx] = False
+            
+            compatible = []
+            for idx in np.flatnonzero(mask):
+                song = self._song_list[idx]
+                compatible.append((song, abs(song.bpm - base_song.bpm)))
+            self._compatible_cache[cache_key] = compatible
+        
+        return list(compatible)
     
     def create_intelligent_remix(self, theme: str = "energetic") -> Dict[str, Any]:
         """Create an intelligent remix based on theme"""
         
-        themes = {
-            "energetic": {
-                "preferred_bpm": 140,
-                "structure": ["intro", "verse", "chorus", "verse", "bridge", "chorus", "chorus", "outro"],
-                "stem_strategy": "high_energy"
-            },
-            "chill": {
-                "preferred_bpm": 95,
-                "structure": ["intro", "verse", "chorus", "verse", "solo", "chorus", "outro"],
-                "stem_strategy": "smooth"
-            },
-            "dramatic": {
-                "preferred_bpm": 125,
-                "structure": ["verse", "verse", "chorus", "bridge", "bridge", "chorus", "chorus"],
-                "stem_strategy": "emotional"
-            }
-        }
-        
-        if theme not in themes:
+        if theme not in REMIX_THEMES:
             theme = "energetic"
             
-        theme_config = themes[theme]
+        theme_config = REMIX_THEMES[theme]
         
-        # Find songs closest to preferred BPM
+        # Find song closest to preferred BPM
         preferred_bpm = theme_config["preferred_bpm"]
-        songs_by_distance = sorted(
-            self.songs.values(), 
-            key=lambda s: abs(s.bpm - preferred_bpm)
-        )
-        
-        reference_song = songs_by_distance[0]
+        reference_idx = int(np.abs(self._bpms - preferred_bpm).argmin())
+        reference_song = self._song_list[reference_idx]
         print(f"Creating {theme} remix based on: {reference_song.name} (BPM: {reference_song.bpm}, Key: {reference_song.key})")
         
         # Find compatible songs (increased tolerance)
-        compatible_songs = []
-        reference_key_compatible = KeyCompatibility.get_compatible_keys(reference_song.key)
-        
-        for song in self.songs.values():
-            if song.name == reference_song.name:
-                continue
-                
-            # Check BPM compatibility with higher tolerance
-            if BPMTolerance.is_compatible(reference_song.bpm, song.bpm, tolerance_percent=15.0):
-                if song.key in reference_key_compatible:
-                    compatible_songs.append(song)
-                    print(f"  Compatible: {song.name} (BPM: {song.bpm}, Key: {song.key})")
+        compatible_songs, pool_orderings = self._remix_pool(reference_song)
+        for song in compatible_songs:
+            print(f"  Compatible: {song.name} (BPM: {song.bpm}, Key: {song.key})")
         
         structure = theme_config["structure"]
         
@@ -211,147 +391,159 @@ class AdvancedMusicMixer:
             "base_song": reference_song.name,
             "base_bpm": reference_song.bpm,
             "base_key": reference_song.key,
-            "structure": structure,
+            "structure": list(structure),
             "sections": {},
             "compatible_songs": [s.name for s in compatible_songs]
         }
         
+        base_bpm = reference_song.bpm
+        
         # Intelligent stem selection based on theme
         for i, section_type in enumerate(structure):
             section_key = f"{i:02d}_{section_type}"
             stems = self.select_intelligent_stems(
-                section_type, reference_song, compatible_songs, theme_config["stem_strategy"]
+                section_type, reference_song, compatible_songs, theme_config["stem_strategy"],
+                pool_orderings
             )
             
             remix_plan["sections"][section_key] = {
                 "type": section_type,
-                "stems": {}
-            }
-            
-            for stem_type, (song, file_path) in stems.items():
-                pitch_shift = BPMTolerance.calculate_pitch_shift(song.bpm, reference_song.bpm)
-                remix_plan["sections"][section_key]["stems"][stem_type] = {
-                    "song": song.name,
-                    "file": file_path,
-                    "bpm": song.bpm,
-                    "key": song.key,
-                    "pitch_shift": pitch_shift,
-                    "needs_timestretch": abs(pitch_shift - 1.0) > 0.05
+                "stems": {
+                    stem_type: {
+                        "song": song.name,
+                        "display_name": song.display_name,
+                        "file": file_path,
+                        "bpm": song.bpm,
+                        "key": song.key,
+                        "pitch_shift": (pitch_shift := base_bpm / song.bpm),
+                        "needs_timestretch": abs(pitch_shift - 1.0) > 0.05
+                    }
+                    for stem_type, (song, file_path) in stems.items()
                 }
+            }
         
         return remix_plan
     
+    def create_intelligent_remixes(self, themes: List[str]) -> List[Dict[str, Any]]:
+        """Create one remix per theme, sharing compatibility work between them"""
+        return [self.create_intelligent_remix(theme) for theme in themes]
+    
+    def _remix_pool(self, reference_song: Song) -> Tuple[List[Song], Dict[str, List[Song]]]:
+        """Compatible songs and pre-sorted pool orderings for a reference song (memoized)"""
+        pool = self._pool_cache.get(reference_song.name)
+        if pool is None:
+            compatible_songs = [song for song, _ in self.find_compatible_songs(
+                reference_song, reference_song.key, tolerance_percent=15.0
+            )]
+            # Song orderings only depend on the pool, so sort once per reference
+            pool = (compatible_songs, self._order_pool([reference_song] + compatible_songs))
+            self._pool_cache[reference_song.name] = pool
+        return pool
+    
+    @staticmethod
+    def _order_pool(songs_pool: List[Song]) -> Dict[str, List[Song]]:
+        """Pre-sort the song pool for every ordering used by STEM_PREFERENCES"""
+        return {
+            "pool": songs_pool,
+            "bpm_asc": sorted(songs_pool, key=lambda s: s.bpm),
+            "bpm_desc": sorted(songs_pool, key=lambda s: s.bpm, reverse=True),
+            "near_120": sorted(songs_pool, key=lambda s: abs(s.bpm - 120)),
+        }
+    
     def select_intelligent_stems(self, section_type: str, reference_song: Song, 
-                               compatible_songs: List[Song], strategy: str) -> Dict[str, Tuple[Song, str]]:
+                               compatible_songs: List[Song], strategy: str,
+                               pool_orderings: Optional[Dict[str, List[Song]]] = None
+                               ) -> Dict[str, Tuple[Song, str]]:
         """Intelligent stem selection based on strategy"""
         selected_stems = {}
         available_stems = ["bass", "drums", "other", "piano", "vocals"]
-        songs_pool = [reference_song] + compatible_songs
+        if pool_orderings is None:
+            pool_orderings = self._order_pool([reference_song] + compatible_songs)
         
-        # Strategy-based selection
-        if strategy == "high_energy":
-            # Prefer higher BPM songs for drums, keep vocals consistent
-            stem_preferences = {
-                "drums": lambda songs: sorted(songs, key=lambda s: s.bpm, reverse=True),
-                "bass": lambda songs: sorted(songs, key=lambda s: s.bpm, reverse=True),
-                "vocals": lambda songs: [reference_song] if reference_song in songs else songs,
-                "piano": lambda songs: songs,
-                "other": lambda songs: sorted(songs, key=lambda s: s.bpm, reverse=True)
-            }
-        elif strategy == "smooth":
-            # Prefer lower BPM, more consistent selection
-            stem_preferences = {
-                "drums": lambda songs: sorted(songs, key=lambda s: s.bpm),
-                "bass": lambda songs: sorted(songs, key=lambda s: s.bpm),
-                "vocals": lambda songs: songs,
-                "piano": lambda songs: sorted(songs, key=lambda s: s.bpm),
-                "other": lambda songs: songs
-            }
-        else:  # emotional
-            # Mix high and low, create dynamic contrasts
-            stem_preferences = {
-                "drums": lambda songs: songs,
-                "bass": lambda songs: sorted(songs, key=lambda s: s.bpm),
-                "vocals": lambda songs: sorted(songs, key=lambda s: abs(s.bpm - 120)),
-                "piano": lambda songs: songs,
-                "other": lambda songs: songs
-            }
+        stem_preferences = STEM_PREFERENCES.get(strategy, STEM_PREFERENCES["emotional"])
+        # Adaptable sections can be taken from any song in the pool
+        adaptable = section_type in ADAPTABLE_SECTIONS
         
         for stem_type in available_stems:
-            candidates = []
-            for song in songs_pool:
-                if stem_type in song.stem_files:
-                    # Check if song has required section or can be adapted
-                    if (song.get_segments_by_type(section_type) or 
-                        section_type in ["intro", "outro", "bridge"]):  # These can be adapted
-                        candidates.append(song)
+            # The first eligible song in the pre-sorted pool is the preferred one
+            chosen_song = next(
+                (song for song in pool_orderings[stem_preferences[stem_type]]
+                 if stem_type in song.stem_files and
+                 (adaptable or section_type in song._label_set)),
+                None
+            )
             
-            if candidates and stem_type in stem_preferences:
-                preferred_candidates = stem_preferences[stem_type](candidates)
-                if preferred_candidates:
-                    chosen_song = preferred_candidates[0]
-                    selected_stems[stem_type] = (chosen_song, chosen_song.stem_files[stem_type])
+            if chosen_song is not None:
+                selected_stems[stem_type] = (chosen_song, chosen_song.stem_files[stem_type])
         
         return selected_stems
     
     def print_advanced_remix_plan(self, remix_plan: Dict[str, Any]):
         """Print detailed remix plan with technical details"""
-        print(f"\n🎵 ADVANCED REMIX PLAN - {remix_plan['theme'].upper()} THEME 🎵")
-        print(f"Base Song: {remix_plan['base_song']}")
-        print(f"Base BPM: {remix_plan['base_bpm']} | Base Key: {remix_plan['base_key']}")
-        print(f"Compatible Songs: {', '.join(remix_plan['compatible_songs'])}")
-        print(f"Structure: {' -> '.join(remix_plan['structure'])}")
-        print("\nSection Details:")
-        print("-" * 100)
+        # Build the report first and emit it with a single write
+        lines: List[str] = []
+        lines.append(f"\n🎵 ADVANCED REMIX PLAN - {remix_plan['theme'].upper()} THEME 🎵")
+        lines.append(f"Base Song: {remix_plan['base_song']}")
+        lines.append(f"Base BPM: {remix_plan['base_bpm']} | Base Key: {remix_plan['base_key']}")
+        lines.append(f"Compatible Songs: {', '.join(remix_plan['compatible_songs'])}")
+        lines.append(f"Structure: {' -> '.join(remix_plan['structure'])}")
+        lines.append("\nSection Details:")
+        lines.append("-" * 100)
         
         for section_key, section_data in remix_plan["sections"].items():
             section_type = section_data["type"]
-            print(f"\n{section_key.upper()}: {section_type.upper()}")
+            lines.append(f"\n{section_key.upper()}: {section_type.upper()}")
             
             for stem_type, stem_data in section_data["stems"].items():
-                song_name = stem_data["song"].split("(")[0].strip()
+                # Plans saved before display_name was stored only have the full song name
+                song_name = stem_data.get("display_name") or stem_data["song"].split("(", 1)[0].strip()
                 bpm = stem_data["bpm"]
                 key = stem_data["key"]
                 pitch_shift = stem_data["pitch_shift"]
                 needs_timestretch = stem_data["needs_timestretch"]
                 
                 timestretch_info = " [TIMESTRETCH]" if needs_timestretch else ""
-                print(f"  {stem_type:8} -> {song_name:20} (BPM: {bpm:3d}, Key: {key:3s}, Shift: {pitch_shift:.2f}){timestretch_info}")
+                lines.append(f"  {stem_type:8} -> {song_name:20} (BPM: {bpm:3d}, Key: {key:3s}, Shift: {pitch_shift:.2f}){timestretch_info}")
+        
+        sys.stdout.write("\n".join(lines) + "\n")
     
     def analyze_mixing_possibilities(self):
         """Analyze and display mixing possibilities"""
-        print(f"\n🔍 MIXING ANALYSIS")
-        print("=" * 60)
+        lines: List[str] = []
+        lines.append(f"\n🔍 MIXING ANALYSIS")
+        lines.append("=" * 60)
         
         # BPM clusters
-        bpm_clusters = {}
-        for song in self.songs.values():
-            cluster = (song.bpm // 20) * 20  # Group by 20 BPM ranges
-            if cluster not in bpm_clusters:
-                bpm_clusters[cluster] = []
-            bpm_clusters[cluster].append(song)
+        clusters = (self._bpms // 20) * 20  # Group by 20 BPM ranges
+        cluster_bpms, inverse, counts = np.unique(clusters, return_inverse=True,
+                                                  return_counts=True)
+        # Stable sort keeps library order within each cluster
+        members = np.split(np.argsort(inverse, kind='stable'), np.cumsum(counts)[:-1])
         
-        print("\n📊 BPM CLUSTERS (±15% mixing tolerance):")
-        for cluster_bpm in sorted(bpm_clusters.keys()):
-            songs_in_cluster = bpm_clusters[cluster_bpm]
-            if len(songs_in_cluster) > 1:
-                print(f"\n{cluster_bpm}-{cluster_bpm+19} BPM Range:")
-                for song in songs_in_cluster:
-                    print(f"  {song.bpm:3d} BPM - {song.name} (Key: {song.key})")
+        lines.append("\n📊 BPM CLUSTERS (±15% mixing tolerance):")
+        for cluster_bpm, song_indices in zip(cluster_bpms, members):
+            if len(song_indices) > 1:
+                cluster_bpm = int(cluster_bpm)
+                lines.append(f"\n{cluster_bpm}-{cluster_bpm+19} BPM Range:")
+                for idx in song_indices:
+                    song = self._song_list[idx]
+                    lines.append(f"  {song.bpm:3d} BPM - {song.name} (Key: {song.key})")
         
         # Key compatibility analysis
-        print(f"\n🎼 KEY COMPATIBILITY ANALYSIS:")
-        keys_used = set(song.key for song in self.songs.values())
+        lines.append(f"\n🎼 KEY COMPATIBILITY ANALYSIS:")
+        keys_used = {song.key for song in self.songs.values()}
         for key in sorted(keys_used):
-            compatible_keys = KeyCompatibility.get_compatible_keys(key)
             songs_with_key = [s for s in self.songs.values() if s.key == key]
-            compatible_songs = [s for s in self.songs.values() if s.key in compatible_keys and s.key != key]
+            compatible_songs = [s for s in self.songs.values()
+                                if s.key != key and KeyCompatibility.are_compatible(key, s.key)]
             
-            print(f"\nKey {key}:")
-            print(f"  Songs: {', '.join([s.name.split('(')[0].strip() for s in songs_with_key])}")
+            lines.append(f"\nKey {key}:")
+            lines.append(f"  Songs: {', '.join([s.display_name for s in songs_with_key])}")
             if compatible_songs:
-                compatible_names = [f"{s.name.split('(')[0].strip()} ({s.key})" for s in compatible_songs]
-                print(f"  Compatible: {', '.join(compatible_names)}")
+                compatible_names = [f"{s.display_name} ({s.key})" for s in compatible_songs]
+                lines.append(f"  Compatible: {', '.join(compatible_names)}")
+        
+        sys.stdout.write("\n".join(lines) + "\n")
 
 def main():
     """Enhanced main function with multiple remix examples"""
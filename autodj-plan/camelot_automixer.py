@@ -7,18 +7,129 @@ Drums are considered harmonically neutral and can work with any key.
 """
 
 import json
+import os
 import random
 import time
 import threading
 import sys
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
+from types import MappingProxyType
 from typing import Dict, List, Tuple, Optional
+import numpy as np
 from pythonosc import udp_client
 
+# orjson parses structure files several times faster than the stdlib
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Numba JIT-compiles the candidate scoring kernel; plain NumPy is used without it
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    
+    def njit(*args, **kwargs):
+        def decorator(func):
+            return func
+        return decorator
+
 # Add parent directory to path for config_loader import
 sys.path.append(str(Path(__file__).parent.parent))
 from config_loader import ConfigLoader, MixerConfig
 
+def _compatible_codes(camelot: str) -> List[str]:
+    """Camelot codes that mix well with the given code"""
+    # Parse Camelot code (e.g., "1A" -> number=1, mode="A")
+    number = int(camelot[:-1])
+    mode = camelot[-1]
+    
+    compatible = []
+    
+    # Rule 1: Same number, different mode (relative major/minor)
+    opposite_mode = "A" if mode == "B" else "B"
+    compatible.append(f"{number}{opposite_mode}")
+    
+    # Rule 2: Adjacent numbers, same mode (±1 on wheel)
+    prev_num = 12 if number == 1 else number - 1
+    next_num = 1 if number == 12 else number + 1
+    compatible.extend([f"{prev_num}{mode}", f"{next_num}{mode}"])
+    
+    # Rule 3: Perfect fifth (±7 positions, same mode)
+    fifth_up = (number + 6) % 12 + 1  # +7 but 0-indexed
+    fifth_down = (number - 8) % 12 + 1  # -7 but 0-indexed  
+    compatible.extend([f"{fifth_up}{mode}", f"{fifth_down}{mode}"])
+    
+    return compatible
+
+def _harmony_from_codes(camelot1: str, camelot2: str) -> float:
+    """Weight a compatible pair of Camelot codes by relationship type"""
+    num1, mode1 = int(camelot1[:-1]), camelot1[-1]
+    num2, mode2 = int(camelot2[:-1]), camelot2[-1]
+    
+    # Same number, different mode (relative major/minor) = 0.9
+    if num1 == num2 and mode1 != mode2:
+        return 0.9
+    
+    # Adjacent numbers = 0.8
+    if abs(num1 - num2) == 1 or abs(num1 - num2) == 11:  # Handle wrap-around
+        return 0.8
+    
+    # Perfect fifth = 0.7
+    if abs(num1 - num2) == 7 or abs(num1 - num2) == 5:  # Handle wrap-around
+        return 0.7
+    
+    return 0.0
+
+def _build_compat_cache(wheel: Dict[int, Tuple[str, str]],
+                        key_to_camelot: Dict[str, str]) -> Dict[str, Tuple[str, ...]]:
+    """Precompute the compatible keys for every key on the wheel"""
+    compat_cache = {}
+    for key, camelot in key_to_camelot.items():
+        # Convert back to musical keys
+        result_keys = []
+        for code in _compatible_codes(camelot):
+            major, minor = wheel[int(code[:-1])]
+            result_keys.append(major if code[-1] == "B" else minor)
+        compat_cache[key] = tuple(result_keys)
+    return compat_cache
+
+def _build_harmony_cache(compat_cache: Dict[str, Tuple[str, ...]],
+                         key_to_camelot: Dict[str, str]) -> Dict[Tuple[str, str], float]:
+    """Precompute harmony scores for every pair of distinct keys"""
+    harmony_cache = {}
+    for key1, compatible_keys in compat_cache.items():
+        for key2 in key_to_camelot:
+            if key1 == key2:
+                continue
+            score = 0.0
+            if key2 in compatible_keys:
+                score = _harmony_from_codes(key_to_camelot[key1], key_to_camelot[key2])
+            harmony_cache[(key1, key2)] = score
+    return harmony_cache
+
+# Mix volume per stem type
+_STEM_VOLUME = MappingProxyType({
+    'vocals': 0.9,
+    'bass': 0.8,
+    'piano': 0.6,
+    'drums': 0.7
+})
+
+def _read_structure(json_file: Path) -> Dict:
+    """Read and parse a single song structure JSON file"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(json_file.read_bytes())
+    with open(json_file, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
 class CamelotWheel:
     """Camelot Wheel implementation for harmonic mixing"""
     
@@ -44,64 +155,35 @@ class CamelotWheel:
         KEY_TO_CAMELOT[major] = f"{number}B"
         KEY_TO_CAMELOT[minor] = f"{number}A"
     
+    CAMELOT_TO_KEY = {camelot: key for key, camelot in KEY_TO_CAMELOT.items()}
+    
+    # Key names plus their bare minor spellings (e.g. "C#" -> "C#m"),
+    # so a normalized key resolves with a single lookup
+    _CAMELOT_LOOKUP = dict(KEY_TO_CAMELOT)
+    for key_name, camelot in KEY_TO_CAMELOT.items():
+        if key_name.endswith('m') and key_name[:-1] not in KEY_TO_CAMELOT:
+            _CAMELOT_LOOKUP[key_name[:-1]] = camelot
+    
+    # The wheel is static, so compatibility and harmony are computed once
+    _COMPAT_CACHE = _build_compat_cache(WHEEL, KEY_TO_CAMELOT)
+    _HARMONY_CACHE = _build_harmony_cache(_COMPAT_CACHE, KEY_TO_CAMELOT)
+    
     @classmethod
     def get_camelot_code(cls, key: str) -> Optional[str]:
         """Convert musical key to Camelot code"""
-        # Normalize key input
-        key = key.strip()
-        
-        # Handle various key formats
-        if key in cls.KEY_TO_CAMELOT:
-            return cls.KEY_TO_CAMELOT[key]
-        
-        # Try with 'm' suffix for minor
-        if key.endswith('m') and key in cls.KEY_TO_CAMELOT:
-            return cls.KEY_TO_CAMELOT[key]
-            
-        # Try adding 'm' for minor keys
-        if key + 'm' in cls.KEY_TO_CAMELOT:
-            return cls.KEY_TO_CAMELOT[key + 'm']
-        
-        return None
+        return _camelot_of(key)
     
     @classmethod
     def get_compatible_keys(cls, key: str) -> List[str]:
         """Get harmonically compatible keys using Camelot Wheel rules"""
-        camelot = cls.get_camelot_code(key)
-        if not camelot:
-            return []
-        
-        # Parse Camelot code (e.g., "1A" -> number=1, mode="A")
-        number = int(camelot[:-1])
-        mode = camelot[-1]
-        
-        compatible = []
-        
-        # Rule 1: Same number, different mode (relative major/minor)
-        opposite_mode = "A" if mode == "B" else "B"
-        compatible.append(f"{number}{opposite_mode}")
-        
-        # Rule 2: Adjacent numbers, same mode (±1 on wheel)
-        prev_num = 12 if number == 1 else number - 1
-        next_num = 1 if number == 12 else number + 1
-        compatible.extend([f"{prev_num}{mode}", f"{next_num}{mode}"])
-        
-        # Rule 3: Perfect fifth (±7 positions, same mode)
-        fifth_up = (number + 6) % 12 + 1  # +7 but 0-indexed
-        fifth_down = (number - 8) % 12 + 1  # -7 but 0-indexed  
-        compatible.extend([f"{fifth_up}{mode}", f"{fifth_down}{mode}"])
-        
-        # Convert back to musical keys
-        result_keys = []
-        for code in compatible:
-            num = int(code[:-1])
-            m = code[-1]
-            if num in cls.WHEEL:
-                major, minor = cls.WHEEL[num]
-                key_name = major if m == "B" else minor
-                result_keys.append(key_name)
-        
-        return result_keys
+        compatible = cls._COMPAT_CACHE.get(key)
+        if compatible is None:
+            # Loosely formatted key names go through the normalizing lookup
+            camelot = cls.get_camelot_code(key)
+            if not camelot:
+                return []
+            compatible = cls._COMPAT_CACHE[cls.CAMELOT_TO_KEY[camelot]]
+        return list(compatible)
     
     @classmethod
     def calculate_harmony_score(cls, key1: str, key2: str) -> float:
@@ -109,33 +191,67 @@ class CamelotWheel:
         if key1 == key2:
             return 1.0
         
-        compatible_keys = cls.get_compatible_keys(key1)
-        if key2 in compatible_keys:
-            # Different weights for different compatibility types
+        score = cls._HARMONY_CACHE.get((key1, key2))
+        if score is None:
             camelot1 = cls.get_camelot_code(key1)
-            camelot2 = cls.get_camelot_code(key2)
-            
-            if camelot1 and camelot2:
-                num1, mode1 = int(camelot1[:-1]), camelot1[-1]
-                num2, mode2 = int(camelot2[:-1]), camelot2[-1]
-                
-                # Same number, different mode (relative major/minor) = 0.9
-                if num1 == num2 and mode1 != mode2:
-                    return 0.9
-                
-                # Adjacent numbers = 0.8
-                if abs(num1 - num2) == 1 or abs(num1 - num2) == 11:  # Handle wrap-around
-                    return 0.8
-                
-                # Perfect fifth = 0.7
-                if abs(num1 - num2) == 7 or abs(num1 - num2) == 5:  # Handle wrap-around
-                    return 0.7
-        
-        return 0.0  # Not compatible
+            if not camelot1:
+                return 0.0  # Not compatible
+            score = cls._HARMONY_CACHE.get((cls.CAMELOT_TO_KEY[camelot1], key2), 0.0)
+        return score
+
+@lru_cache(maxsize=128)
+def _camelot_of(key: str) -> Optional[str]:
+    """Normalize a key name and resolve its Camelot code"""
+    return CamelotWheel._CAMELOT_LOOKUP.get(key.strip())
+
+@njit(cache=True)
+def score_candidates(candidates, key_idx, harmony_by_key, bpms, target_bpm,
+                     bpm_tolerance, harmony_threshold):
+    """Score candidate songs, keeping those that pass the BPM and harmony checks"""
+    source_bpms = bpms[candidates]
+    ratio = target_bpm / source_bpms
+    half_ratio = target_bpm / (source_bpms * 2)
+    double_ratio = target_bpm / (source_bpms / 2)
+    
+    direct_ok = np.abs(ratio - 1.0) <= bpm_tolerance
+    half_ok = np.abs(half_ratio - 1.0) <= bpm_tolerance
+    double_ok = np.abs(double_ratio - 1.0) <= bpm_tolerance
+    
+    # Direct tempo wins over half time, which wins over double time
+    stretch_ratios = np.where(direct_ok, ratio,
+                              np.where(half_ok, half_ratio,
+                                       np.where(double_ok, double_ratio, ratio)))
+    harmony_scores = harmony_by_key[key_idx[candidates]]
+    
+    keep = (direct_ok | half_ok | double_ok) & (harmony_scores >= harmony_threshold)
+    stretch_ratios = stretch_ratios[keep]
+    harmony_scores = harmony_scores[keep]
+    
+    bpm_scores = 1.0 - np.abs(stretch_ratios - 1.0)  # Closer to 1.0 is better
+    overall_scores = (harmony_scores * 0.7) + (bpm_scores * 0.3)
+    return candidates[keep], harmony_scores, stretch_ratios, bpm_scores, overall_scores
+
+@dataclass(slots=True)
+class ActiveStem:
+    """A stem buffer currently playing in the mix"""
+    buffer_id: int
+    song: Dict
+    stretch_ratio: float
+    pitch_shift: float
+    final_rate: float
 
 class CamelotAutomixer:
     """Intelligent automixer using Camelot Wheel harmonic theory"""
     
+    # Candidate keys for _estimate_key, split at the BPM boundaries below
+    _KEY_BUCKET_BPMS = (80, 100, 130)
+    _KEY_BUCKETS = (
+        ('Am', 'Em', 'Dm'),                 # Slower ballads often minor
+        ('C', 'G', 'F', 'Am'),
+        ('C', 'G', 'D', 'A', 'Em', 'Bm'),
+        ('G', 'D', 'A', 'E', 'B')           # Faster songs often major
+    )
+    
     def __init__(self, stems_dir: str = "../stems", structures_dir: str = "../song-structures",
                  sc_host: str = "localhost", sc_port: int = 57120,
                  config_file: str = "mixer_config.json"):
@@ -166,10 +282,18 @@ class CamelotAutomixer:
         # Song database
         self.songs = []
         self.song_structures = {}
+        self._by_key = {}  # stem_type -> key -> indices into self.songs
+        self._bpms = np.empty(0)  # BPM of each song, parallel to self.songs
+        self._key_names = []  # Distinct song keys
+        self._key_idx = np.empty(0, dtype=np.intp)  # Index into _key_names per song
+        
+        # Ranked candidates per stem type for the current key/BPM target
+        self._last_candidates = {}
+        self._cache_key = None
         
         # Buffer management
         self.next_buffer_id = 2000  # Start higher to avoid conflicts
-        self.active_buffers = {}
+        self.active_buffers: Dict[str, ActiveStem] = {}
         
         # Mixing parameters
         self.bpm_tolerance = 0.15  # ±15% BPM range
@@ -187,42 +311,64 @@ class CamelotAutomixer:
         """Load song metadata and structure information"""
         print("📚 Loading song database...")
         
-        # Load song structures
+        # Load song structures; the files are independent, so parse them concurrently
         if self.structures_dir.exists():
-            for json_file in self.structures_dir.glob("*.json"):
-                try:
-                    with open(json_file, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-                    
-                    song_id = json_file.stem
-                    self.song_structures[song_id] = {
-                        'bpm': data.get('bpm', 120),
-                        'key': data.get('key', 'C'),  # If available in JSON
-                        'segments': data.get('segments', [])
-                    }
-                except Exception as e:
-                    print(f"⚠️  Could not load structure {json_file.name}: {e}")
+            json_files = list(self.structures_dir.glob("*.json"))
+            if json_files:
+                with ThreadPoolExecutor(max_workers=min(16, len(json_files))) as executor:
+                    futures = [executor.submit(_read_structure, json_file) for json_file in json_files]
+                
+                for json_file, future in zip(json_files, futures):
+                    try:
+                        data = future.result()
+                        
+                        song_id = json_file.stem
+                        self.song_structures[song_id] = {
+                            'bpm': data.get('bpm', 120),
+                            # If available in JSON; normalized once here rather than per lookup
+                            'key': data.get('key', 'C').strip(),
+                            'segments': data.get('segments', [])
+                        }
+                    except Exception as e:
+                        print(f"⚠️  Could not load structure {json_file.name}: {e}")
         
         # Load song stems and estimate keys
         if self.stems_dir.exists():
-            for song_dir in self.stems_dir.iterdir():
-                if song_dir.is_dir():
-                    song_data = self._analyze_song(song_dir)
-                    if song_data:
-                        self.songs.append(song_data)
+            with os.scandir(self.stems_dir) as entries:
+                song_dirs = [Path(entry.path) for entry in entries if entry.is_dir()]
+            for song_dir in song_dirs:
+                song_data = self._analyze_song(song_dir)
+                if song_data:
+                    self._index_song(len(self.songs), song_data)
+                    self.songs.append(song_data)
+        
+        self._bpms = np.array([song['bpm'] for song in self.songs], dtype=np.float64)
+        self._key_names = sorted({song['key'] for song in self.songs})
+        key_positions = {key: i for i, key in enumerate(self._key_names)}
+        self._key_idx = np.array([key_positions[song['key']] for song in self.songs],
+                                 dtype=np.intp)
         
         print(f"✅ Loaded {len(self.songs)} songs with harmonic analysis")
     
+    def _index_song(self, song_index: int, song_data: Dict):
+        """Register a song in the stem type / key lookup"""
+        for stem_type in song_data['stems']:
+            by_key = self._by_key.setdefault(stem_type, {})
+            by_key.setdefault(song_data['key'], []).append(song_index)
+    
     def _analyze_song(self, song_dir: Path) -> Optional[Dict]:
         """Analyze individual song and estimate key if not provided"""
         song_id = song_dir.name
         
-        # Check for available stems
+        # Check for available stems with a single directory listing
+        with os.scandir(song_dir) as entries:
+            file_names = {entry.name for entry in entries}
         stems = {}
+        stem_paths = {}  # Absolute path strings sent to the audio server
         for stem_type in ['vocals', 'bass', 'piano', 'drums', 'other']:
-            stem_file = song_dir / f"{stem_type}.wav"
-            if stem_file.exists():
-                stems[stem_type] = stem_file
+            if f"{stem_type}.wav" in file_names:
+                stems[stem_type] = song_dir / f"{stem_type}.wav"
+                stem_paths[stem_type] = str(stems[stem_type].absolute())
         
         if len(stems) < 2:  # Need at least 2 stems
             return None
@@ -239,6 +385,7 @@ class CamelotAutomixer:
             'id': song_id,
             'name': song_dir.name.replace('_', ' ').title(),
             'stems': stems,
+            'stem_paths': stem_paths,
             'bpm': bpm,
             'key': key,
             'camelot_code': CamelotWheel.get_camelot_code(key),
@@ -256,14 +403,7 @@ class CamelotAutomixer:
         # In a real system, this would use audio analysis
         
         # Map BPM ranges to common Eurovision keys
-        if bpm < 80:
-            return random.choice(['Am', 'Em', 'Dm'])  # Slower ballads often minor
-        elif bpm < 100:
-            return random.choice(['C', 'G', 'F', 'Am'])
-        elif bpm < 130:
-            return random.choice(['C', 'G', 'D', 'A', 'Em', 'Bm'])
-        else:
-            return random.choice(['G', 'D', 'A', 'E', 'B'])  # Faster songs often major
+        return random.choice(self._KEY_BUCKETS[bisect_right(self._KEY_BUCKET_BPMS, bpm)])
     
     def _calculate_bpm_compatibility(self, source_bpm: float, target_bpm: float) -> Tuple[bool, float]:
         """Calculate if BPMs are compatible and return stretch ratio"""
@@ -284,63 +424,109 @@ class CamelotAutomixer:
         
         return False, ratio
     
-    def _find_compatible_stems(self, stem_type: str) -> List[Dict]:
-        """Find stems compatible with current key and BPM"""
-        compatible = []
+    def _candidate_indices(self, stem_type: str) -> np.ndarray:
+        """Indices of songs having the stem whose key can reach the harmony threshold"""
+        by_key = self._by_key.get(stem_type, {})
         
-        for song in self.songs:
-            if stem_type not in song['stems']:
-                continue
-            
-            # Drums are harmonically neutral
-            if stem_type == 'drums':
-                harmony_score = 1.0
-            else:
-                harmony_score = CamelotWheel.calculate_harmony_score(
-                    self.target_key, song['key']
-                )
-            
-            # Check BPM compatibility
-            bpm_compatible, stretch_ratio = self._calculate_bpm_compatibility(
-                song['bpm'], self.master_bpm
+        # Drums are harmonically neutral; any other key scores 0.0
+        if stem_type == 'drums' or self.harmony_threshold <= 0:
+            keys = by_key.keys()
+        else:
+            keys = set(CamelotWheel.get_compatible_keys(self.target_key))
+            keys.add(self.target_key)
+        
+        # Keep load order so ties rank as before
+        indices = sorted(i for key in keys for i in by_key.get(key, ()))
+        return np.array(indices, dtype=np.intp)
+    
+    def _find_compatible_stems(self, stem_type: str, limit: Optional[int] = None) -> List[Dict]:
+        """Find stems compatible with current key and BPM, best first"""
+        # Rankings only change with the mixing target, so reuse them until it moves
+        cache_key = (self.target_key, self.master_bpm, self.bpm_tolerance, self.harmony_threshold)
+        if cache_key != self._cache_key:
+            self._last_candidates = {}
+            self._cache_key = cache_key
+        
+        ranked = self._last_candidates.get(stem_type)
+        if ranked is None:
+            ranked = self._rank_candidates(stem_type)
+            self._last_candidates[stem_type] = ranked
+        
+        # Only the requested entries are turned into dicts
+        indices, harmony_scores, stretch_ratios, bpm_scores, overall_scores = (
+            scores[:limit].tolist() for scores in ranked
+        )
+        return [
+            {
+                'song': self.songs[song_index],
+                'harmony_score': harmony_score,
+                'bmp_score': bpm_score,
+                'stretch_ratio': stretch_ratio,
+                'overall_score': overall_score
+            }
+            for song_index, harmony_score, stretch_ratio, bpm_score, overall_score in zip(
+                indices, harmony_scores, stretch_ratios, bpm_scores, overall_scores
             )
-            
-            if harmony_score >= self.harmony_threshold and bpm_compatible:
-                # Calculate overall compatibility score
-                bpm_score = 1.0 - abs(stretch_ratio - 1.0)  # Closer to 1.0 is better
-                overall_score = (harmony_score * 0.7) + (bpm_score * 0.3)
-                
-                compatible.append({
-                    'song': song,
-                    'harmony_score': harmony_score,
-                    'bmp_score': bpm_score,
-                    'stretch_ratio': stretch_ratio,
-                    'overall_score': overall_score
-                })
-        
-        # Sort by overall compatibility score
-        compatible.sort(key=lambda x: x['overall_score'], reverse=True)
-        return compatible
+        ]
+    
+    def _rank_candidates(self, stem_type: str) -> Tuple[np.ndarray, ...]:
+        """Score arrays for compatible songs, sorted by overall score"""
+        # Drums are harmonically neutral
+        if stem_type == 'drums':
+            harmony_by_key = np.ones(len(self._key_names))
+        else:
+            harmony_by_key = np.array([
+                CamelotWheel.calculate_harmony_score(self.target_key, key)
+                for key in self._key_names
+            ], dtype=np.float64)
+        
+        scores = score_candidates(
+            self._candidate_indices(stem_type), self._key_idx, harmony_by_key,
+            self._bpms, self.master_bpm, self.bpm_tolerance, self.harmony_threshold
+        )
+        
+        # Stable so ties keep load order
+        order = np.argsort(-scores[-1], kind='stable')
+        return tuple(values[order] for values in scores)
     
     def _load_and_play_stem(self, song: Dict, stem_type: str, stretch_ratio: float, volume: float = 0.8):
         """Load and play a stem with proper pitch and time adjustments"""
-        stem_file = song['stems'][stem_type]
+        buffer_id = self._send_load(song, stem_type)
+        if buffer_id is None:
+            return None
+        
+        # Wait for load
+        time.sleep(self._load_wait_time([buffer_id]))
+        
+        return self._send_play(song, stem_type, buffer_id, stretch_ratio, volume)
+    
+    def _load_wait_time(self, buffer_ids: List[int]) -> float:
+        """Seconds to wait for buffers to load (the first buffer takes longer)"""
+        return 1.5 if 2000 in buffer_ids else 1.0
+    
+    def _send_load(self, song: Dict, stem_type: str) -> Optional[int]:
+        """Send /load_buffer for a stem and return its buffer id"""
         buffer_id = self.next_buffer_id
         self.next_buffer_id += 1
         
         stem_name = f"{song['name']}_{stem_type}"
         
         try:
-            # Load buffer
             self.sc_client.send_message("/load_buffer", [
                 buffer_id,
-                str(stem_file.absolute()),
+                song['stem_paths'][stem_type],
                 stem_name
             ])
+            return buffer_id
             
-            # Wait for load
-            time.sleep(1.5 if buffer_id == 2000 else 1.0)
-            
+        except Exception as e:
+            print(f"❌ Error loading {stem_name}: {e}")
+            return None
+    
+    def _send_play(self, song: Dict, stem_type: str, buffer_id: int,
+                   stretch_ratio: float, volume: float = 0.8) -> Optional[int]:
+        """Start a loaded stem buffer with pitch and time adjustments"""
+        try:
             # Calculate pitch shift for harmonic alignment
             pitch_shift = self._calculate_pitch_shift(song['key'], self.target_key)
             
@@ -357,13 +543,13 @@ class CamelotAutomixer:
             ])
             
             # Store buffer info
-            self.active_buffers[stem_type] = {
-                'buffer_id': buffer_id,
-                'song': song,
-                'stretch_ratio': stretch_ratio,
-                'pitch_shift': pitch_shift,
-                'final_rate': final_rate
-            }
+            self.active_buffers[stem_type] = ActiveStem(
+                buffer_id=buffer_id,
+                song=song,
+                stretch_ratio=stretch_ratio,
+                pitch_shift=pitch_shift,
+                final_rate=final_rate
+            )
             
             harmony_score = CamelotWheel.calculate_harmony_score(song['key'], self.target_key)
             
@@ -376,7 +562,7 @@ class CamelotAutomixer:
             return buffer_id
             
         except Exception as e:
-            print(f"❌ Error loading {stem_name}: {e}")
+            print(f"❌ Error playing {song['name']}_{stem_type}: {e}")
             return None
     
     def _calculate_pitch_shift(self, source_key: str, target_key: str) -> float:
@@ -395,7 +581,7 @@ class CamelotAutomixer:
         """Stop and cleanup a specific stem"""
         if stem_type in self.active_buffers:
             buffer_info = self.active_buffers[stem_type]
-            buffer_id = buffer_info['buffer_id']
+            buffer_id = buffer_info.buffer_id
             
             try:
                 self.sc_client.send_message("/stop_stem", [buffer_id])
@@ -421,11 +607,12 @@ class CamelotAutomixer:
         for stem_type in list(self.active_buffers.keys()):
             self._stop_stem(stem_type)
         
-        # Select new stems for each type
+        # Select new stems for each type and send all buffer loads up front
         stem_types = ['vocals', 'bass', 'piano', 'drums']
+        pending = []
         
         for stem_type in stem_types:
-            compatible_stems = self._find_compatible_stems(stem_type)
+            compatible_stems = self._find_compatible_stems(stem_type, limit=1)
             
             if compatible_stems:
                 # Select best compatible stem
@@ -434,17 +621,21 @@ class CamelotAutomixer:
                 stretch_ratio = best_stem['stretch_ratio']
                 
                 # Set volume based on stem type
-                volume = {
-                    'vocals': 0.9,
-                    'bass': 0.8,
-                    'piano': 0.6,
-                    'drums': 0.7
-                }.get(stem_type, 0.8)
+                volume = _STEM_VOLUME.get(stem_type, 0.8)
                 
-                self._load_and_play_stem(song, stem_type, stretch_ratio, volume)
+                buffer_id = self._send_load(song, stem_type)
+                if buffer_id is not None:
+                    pending.append((song, stem_type, buffer_id, stretch_ratio, volume))
             else:
                 print(f"❌ No compatible {stem_type} stems found")
         
+        # The server loads buffers in parallel, so a single wait covers them all
+        if pending:
+            time.sleep(self._load_wait_time([buffer_id for _, _, buffer_id, _, _ in pending]))
+        
+        for song, stem_type, buffer_id, stretch_ratio, volume in pending:
+            self._send_play(song, stem_type, buffer_id, stretch_ratio, volume)
+        
         # Set crossfade for balanced mix
         try:
             self.sc_client.send_message("/crossfade_levels", [0.8, 0.8])
@@ -465,11 +656,11 @@ class CamelotAutomixer:
         
         print(f"\n🔄 EVOLVING MIX: Changing {stem_type}...")
         
-        # Find alternative compatible stems
-        compatible_stems = self._find_compatible_stems(stem_type)
+        # Find alternative compatible stems; the current song can take at most one slot
+        compatible_stems = self._find_compatible_stems(stem_type, limit=2)
         
         # Filter out currently playing song
-        current_song_id = self.active_buffers[stem_type]['song']['id']
+        current_song_id = self.active_buffers[stem_type].song['id']
         compatible_stems = [s for s in compatible_stems if s['song']['id'] != current_song_id]
         
         if compatible_stems:
@@ -481,12 +672,7 @@ class CamelotAutomixer:
             song = best_stem['song']
             stretch_ratio = best_stem['stretch_ratio']
             
-            volume = {
-                'vocals': 0.9,
-                'bass': 0.8,
-                'piano': 0.6,
-                'drums': 0.7
-            }.get(stem_type, 0.8)
+            volume = _STEM_VOLUME.get(stem_type, 0.8)
             
             self._load_and_play_stem(song, stem_type, stretch_ratio, volume)
             print("✅ Mix evolved successfully")
@@ -525,12 +711,12 @@ class CamelotAutomixer:
         
         # Update all active stems with new rates
         for stem_type, buffer_info in self.active_buffers.items():
-            song = buffer_info['song']
-            buffer_id = buffer_info['buffer_id']
+            song = buffer_info.song
+            buffer_id = buffer_info.buffer_id
             
             # Recalculate stretch ratio
             _, new_stretch_ratio = self._calculate_bpm_compatibility(song['bpm'], new_bpm)
-            pitch_shift = buffer_info['pitch_shift']
+            pitch_shift = buffer_info.pitch_shift
             new_final_rate = new_stretch_ratio * pitch_shift
             
             try:
@@ -543,8 +729,8 @@ class CamelotAutomixer:
                     0.0   # start pos
                 ])
                 
-                buffer_info['stretch_ratio'] = new_stretch_ratio
-                buffer_info['final_rate'] = new_final_rate
+                buffer_info.stretch_ratio = new_stretch_ratio
+                buffer_info.final_rate = new_final_rate
                 
                 print(f"🔄 Updated {stem_type}: rate {new_final_rate:.3f}")
                 
@@ -563,10 +749,10 @@ class CamelotAutomixer:
         
         print(f"\nActive Stems ({len(self.active_buffers)}):")
         for stem_type, buffer_info in self.active_buffers.items():
-            song = buffer_info['song']
+            song = buffer_info.song
             harmony = CamelotWheel.calculate_harmony_score(song['key'], self.target_key)
             print(f"  {stem_type:8s}: {song['name'][:20]:20s} | "
-                  f"{song['key']:4s} | H:{harmony:.2f} | R:{buffer_info['final_rate']:.3f}")
+                  f"{song['key']:4s} | H:{harmony:.2f} | R:{buffer_info.final_rate:.3f}")
         
         print("=" * 60)
     
@@ -4,14 +4,24 @@ Simple Demo Script for the Eurovision Music Mixing Engine
 Shows basic usage and creates example remixes
 """
 
-from advanced_mixer import AdvancedMusicMixer
-import json
+from bisect import bisect_right
+from itertools import islice
+
+# Banner rules used by the demo output
+_BAR50 = "=" * 50
+_BAR60 = "=" * 60
+
+# Remix theme by base BPM: chill below 110, energetic above 130, dramatic in between.
+# bisect_right puts a BPM equal to a break in the upper bin; BPMs are whole numbers,
+# so 131 is the first energetic one
+_THEME_BREAKS = (110, 131)
+_THEMES = ("chill", "dramatic", "energetic")
 
 def create_custom_remix(mixer, base_song_name=None):
     """Create a custom remix with user-friendly interface"""
     
     print("\n🎵 CREATING CUSTOM REMIX 🎵")
-    print("=" * 50)
+    print(_BAR50)
     
     if base_song_name and base_song_name in mixer.songs:
         base_song = mixer.songs[base_song_name]
@@ -19,21 +29,18 @@ def create_custom_remix(mixer, base_song_name=None):
         print(f"BPM: {base_song.bpm} | Key: {base_song.key}")
     else:
         print("Available songs:")
-        for i, (name, song) in enumerate(mixer.songs.items(), 1):
-            short_name = name.split("(")[0].strip()
-            print(f"  {i:2d}. {short_name} (BPM: {song.bpm}, Key: {song.key})")
+        for i, song in enumerate(mixer.songs.values(), 1):
+            print(f"  {i:2d}. {song.display_name} (BPM: {song.bpm}, Key: {song.key})")
         return None
     
     # Find compatible songs
     compatible = mixer.find_compatible_songs(base_song, base_song.key)
     print(f"\nCompatible songs for mixing ({len(compatible)} found):")
-    for song in compatible:
-        short_name = song.name.split("(")[0].strip() 
-        bpm_diff = abs(song.bpm - base_song.bpm)
-        print(f"  - {short_name} (BPM: {song.bpm}, Δ{bpm_diff}, Key: {song.key})")
+    for song, bpm_diff in compatible:
+        print(f"  - {song.display_name} (BPM: {song.bpm}, Δ{bpm_diff}, Key: {song.key})")
     
     # Create themed remix
-    theme = "energetic" if base_song.bpm > 130 else "chill" if base_song.bpm < 110 else "dramatic"
+    theme = _THEMES[bisect_right(_THEME_BREAKS, base_song.bpm)]
     print(f"\nAuto-selecting theme: {theme.upper()}")
     
     remix = mixer.create_intelligent_remix(theme)
@@ -42,73 +49,66 @@ def create_custom_remix(mixer, base_song_name=None):
     print(f"\n📝 REMIX SUMMARY")
     print(f"Theme: {remix['theme'].title()}")
     print(f"Structure: {' → '.join(remix['structure'])}")
-    print(f"Base Song: {remix['base_song'].split('(')[0].strip()}")
+    print(f"Base Song: {mixer.songs[remix['base_song']].display_name}")
     print(f"Using {len(remix['compatible_songs'])} compatible songs")
     
     return remix
 
 def save_remix_plan(remix, filename):
     """Save remix plan to JSON file for future use"""
-    with open(filename, 'w') as f:
-        json.dump(remix, f, indent=2)
+    from advanced_mixer import dump_remix_plan
+    
+    dump_remix_plan(remix, filename)
     print(f"\n💾 Remix plan saved to: {filename}")
 
 def quick_demo():
     """Run a quick demo of the mixing engine"""
     print("🎼 Eurovision Music Mixing Engine Demo")
-    print("=" * 60)
+    print(_BAR60)
+    
+    # Imported here so loading this module doesn't pull in NumPy/Numba
+    from advanced_mixer import AdvancedMusicMixer
     
     # Initialize mixer
     mixer = AdvancedMusicMixer("../stems", "../song-structures")
     
     # Show available songs grouped by BPM
     print(f"\n📚 Song Library ({len(mixer.songs)} songs):")
-    songs_by_bpm = sorted(mixer.songs.values(), key=lambda s: s.bpm)
-    
-    current_range = None
-    for song in songs_by_bpm:
-        bpm_range = f"{(song.bpm//20)*20}-{(song.bpm//20)*20+19}"
-        if bpm_range != current_range:
-            print(f"\n{bpm_range} BPM:")
-            current_range = bpm_range
-        
-        short_name = song.name.split("(")[0].strip()
-        print(f"  {song.bpm:3d} BPM - {short_name:25s} (Key: {song.key})")
+    # Rows are pre-formatted and BPM-sorted, so a band header starts each new band
+    band = None
+    for bpm, bpm_s, name, key in mixer.song_listing:
+        if bpm // 20 != band:
+            band = bpm // 20
+            print(f"\n{band*20}-{band*20+19} BPM:")
+        print(f"  {bpm_s} BPM - {name:25s} (Key: {key})")
     
     # Demo different themes
     themes = ["energetic", "chill", "dramatic"]
-    for theme in themes:
-        print(f"\n{'='*60}")
+    remixes = mixer.create_intelligent_remixes(themes)
+    for theme, remix in zip(themes, remixes):
+        print(f"\n{_BAR60}")
         print(f"DEMO: {theme.upper()} REMIX")
-        print('='*60)
-        
-        remix = mixer.create_intelligent_remix(theme)
+        print(_BAR60)
         
         print(f"\n🎯 {theme.title()} Remix Summary:")
-        print(f"Base: {remix['base_song'].split('(')[0].strip()} ({remix['base_bpm']} BPM, {remix['base_key']})")
+        print(f"Base: {mixer.songs[remix['base_song']].display_name} ({remix['base_bpm']} BPM, {remix['base_key']})")
         print(f"Compatible songs: {len(remix['compatible_songs'])}")
         print(f"Structure: {' → '.join(remix['structure'])}")
         
         # Show some interesting stem combinations
         print(f"\n🎪 Interesting Combinations:")
-        section_count = 0
-        for section_key, section_data in remix["sections"].items():
-            if section_count >= 3:  # Show only first 3 sections
-                break
+        # Show only first 3 sections
+        for section_key, section_data in islice(remix["sections"].items(), 3):
             section_type = section_data["type"]
             
             # Find stems from different songs
-            different_songs = set()
-            for stem_data in section_data["stems"].values():
-                different_songs.add(stem_data["song"].split("(")[0].strip())
+            different_songs = {stem_data["display_name"] for stem_data in section_data["stems"].values()}
             
             if len(different_songs) > 1:
                 print(f"  {section_type.title()}: Mixing {len(different_songs)} different songs")
                 for stem_type, stem_data in section_data["stems"].items():
-                    song_name = stem_data["song"].split("(")[0].strip()
                     if stem_data.get("needs_timestretch", False):
-                        print(f"    {stem_type}: {song_name} [time-stretched]")
-            section_count += 1
+                        print(f"    {stem_type}: {stem_data['display_name']} [time-stretched]")
         
         # Save example
         filename = f"remix_{theme}_example.json" 
@@ -119,9 +119,9 @@ def main():
     try:
         quick_demo()
         
-        print(f"\n" + "="*60)
+        print("\n" + _BAR60)
         print("DEMO COMPLETED! 🎉")
-        print("="*60)
+        print(_BAR60)
         print(f"\nYou now have:")
         print(f"  • music_mixer.py - Basic mixing engine")
         print(f"  • advanced_mixer.py - Advanced engine with key detection")
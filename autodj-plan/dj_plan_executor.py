@@ -4,26 +4,91 @@ DJ Plan Executor for SuperCollider
 Execute remix plans created by demo_mixer.py in real-time with SuperCollider like a professional DJ
 """
 
+import itertools
 import json
+import logging
+import os
+import sched
 import time
 import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-from pythonosc import udp_client
-from typing import Dict, List, Any
+from pythonosc import dispatcher, osc_bundle_builder, osc_message, osc_message_builder, udp_client
+from pythonosc.osc_server import ThreadingOSCUDPServer
+from typing import Callable, Dict, List, Any, Optional
 import argparse
 
-# Try to import audio libraries for duration detection
+# Try to import audio libraries for duration detection (header reads only)
 try:
     import soundfile as sf
     SOUNDFILE_AVAILABLE = True
+    # Extensions libsndfile can open, e.g. {'.wav', '.flac', '.ogg', ...}
+    SOUNDFILE_EXTENSIONS = frozenset(f".{fmt.lower()}" for fmt in sf.available_formats())
 except ImportError:
     SOUNDFILE_AVAILABLE = False
+    SOUNDFILE_EXTENSIONS = frozenset()
 
 try:
-    import librosa
-    LIBROSA_AVAILABLE = True
+    import audiofile
+    AUDIOFILE_AVAILABLE = True
 except ImportError:
-    LIBROSA_AVAILABLE = False
+    AUDIOFILE_AVAILABLE = False
+
+# Faster JSON parsing for plan files when available
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Seconds ahead that a section's bundled stem starts are timestamped, so
+# SuperCollider can schedule every synth of the section for the same moment
+STEM_START_LATENCY = 0.2
+
+# Longest wait for SuperCollider to confirm pending buffer loads via /synced
+SYNC_TIMEOUT = 10.0
+HEADER_READAHEAD = 65536  # Bytes of each stem file to prefetch for header probes
+
+def _osc_message(address: str, params: List[Any]) -> osc_message.OscMessage:
+    """Build an OSC message that can be sent alone or added to a bundle"""
+    builder = osc_message_builder.OscMessageBuilder(address)
+    for param in params:
+        builder.add_arg(param)
+    return builder.build()
+
+def _advise_header(abs_path: str):
+    """Ask the kernel to start reading a file's header into the page cache"""
+    if not hasattr(os, 'posix_fadvise'):  # Not available on Windows/macOS
+        return
+    try:
+        fd = os.open(abs_path, os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, HEADER_READAHEAD, os.POSIX_FADV_WILLNEED)
+        finally:
+            os.close(fd)
+    except OSError:
+        pass
+
+@dataclass(slots=True)
+class FileMeta:
+    """Filesystem facts about one stem file, gathered once per executor"""
+    abs_path: str
+    exists: bool
+    size_mb: float
+    duration: Optional[float] = None  # Seconds, probed on first use
+
+@dataclass(slots=True)
+class SectionStems:
+    """One section's stems as parallel columns, flattened once at plan load"""
+    stem_types: List[str]
+    files: List[str]
+    song_names: List[str]  # Song titles without the "(Eurovision ...)" suffix
+    rates: List[float]
+    volumes: List[float]
+    buffer_ids: List[int]  # Pre-assigned per file, shared by every section using it
+    has_deck_a: bool = False  # Any buffer below 1100 (routed to deck A)
+    has_deck_b: bool = False  # Any buffer from 1100 up (routed to deck B)
 
 class DJPlanExecutor:
     """Execute DJ remix plans with SuperCollider like a professional DJ"""
@@ -32,13 +97,44 @@ class DJPlanExecutor:
         self.sc_host = sc_host
         self.sc_port = sc_port
         self.sc_client = udp_client.SimpleUDPClient(sc_host, sc_port)
+        self.log = logging.getLogger("dj_exec")
         
         # State tracking
-        self.loaded_buffers: Dict[str, int] = {}
+        self.loaded_buffers: Dict[str, int] = {}  # File -> buffer ID, assigned at plan load
         self.next_buffer_id = 1000
+        self._resident_buffers = set()  # Buffer IDs currently loaded in SuperCollider
         self.current_section = 0
         self.playing = False
         self.plan_data = None
+        self._file_meta: Dict[str, FileMeta] = {}  # Plan file path -> resolved metadata
+        self._next_section: Dict[str, Optional[str]] = {}  # Section key -> key played after it
+        self._section_stems: Dict[str, SectionStems] = {}
+        self._section_keys: List[str] = []  # Sorted, i.e. play order
+        
+        # Interactive commands; each handler gets the words after the command
+        self._handlers: Dict[str, Callable[[List[str]], None]] = {
+            "info": self._cmd_info,
+            "list": self._cmd_list,
+            "play": self._cmd_play,
+            "full": self._cmd_full,
+            "stop": self._cmd_stop,
+            "status": self._cmd_status,
+        }
+        
+        # /sync handshake: SuperCollider answers /synced <id> once pending loads are done
+        self._sync_ids = itertools.count(1)
+        self._sync_events: Dict[int, threading.Event] = {}
+        self.reply_server = None
+        self.reply_port = 0
+        self._setup_reply_server()
+        
+        # One long-lived scheduler thread runs timed section advances
+        self._sched = sched.scheduler(time.monotonic, self._sched_delay)
+        self._sched_wakeup = threading.Event()
+        self._advance_event = None
+        self._plan_finished = threading.Event()
+        self._sched_thread = threading.Thread(target=self._run_scheduler, daemon=True)
+        self._sched_thread.start()
         
         print(f"🎧🎛️ DJ Plan Executor initialized")
         print(f"🔌 SuperCollider: {sc_host}:{sc_port}")
@@ -56,13 +152,118 @@ class DJPlanExecutor:
         except Exception as e:
             print(f"⚠️  Could not test SuperCollider connection: {e}")
     
+    def _setup_reply_server(self):
+        """Listen for /synced replies on an ephemeral UDP port"""
+        disp = dispatcher.Dispatcher()
+        disp.map("/synced", self._handle_synced)
+        try:
+            self.reply_server = ThreadingOSCUDPServer(("0.0.0.0", 0), disp)
+            self.reply_port = self.reply_server.server_address[1]
+            reply_thread = threading.Thread(target=self.reply_server.serve_forever, daemon=True)
+            reply_thread.start()
+        except Exception as e:
+            print(f"⚠️  Could not start reply listener: {e}")
+    
+    def _handle_synced(self, address: str, sync_id: int, *args):
+        """Release the waiter for a /sync id"""
+        event = self._sync_events.pop(int(sync_id), None)
+        if event is not None:
+            event.set()
+    
+    def _wait_for_sync(self, bundle: osc_bundle_builder.OscBundleBuilder = None,
+                       timeout: float = SYNC_TIMEOUT) -> bool:
+        """Block until SuperCollider has finished everything sent before this call
+        
+        If a bundle is given, /sync is appended to it and the whole bundle is sent.
+        """
+        if self.reply_server is None:
+            if bundle is not None:
+                self._send_with_retry(bundle.build())
+            time.sleep(3)  # No way to hear /synced, fall back to a fixed wait
+            return True
+        
+        sync_id = next(self._sync_ids)
+        event = threading.Event()
+        self._sync_events[sync_id] = event
+        message = _osc_message("/sync", [sync_id, self.reply_port])
+        try:
+            if bundle is not None:
+                bundle.add_content(message)
+                self._send_with_retry(bundle.build())
+            else:
+                self._send_with_retry(message)
+        except Exception as e:
+            print(f"⚠️  Sync request failed: {e}")
+        
+        if event.wait(timeout):
+            return True
+        self._sync_events.pop(sync_id, None)
+        return False
+    
+    def _sched_delay(self, timeout: Optional[float]):
+        """Sleep up to timeout, returning early when something new is scheduled"""
+        if self._sched_wakeup.wait(timeout):
+            self._sched_wakeup.clear()
+    
+    def _run_scheduler(self):
+        """Scheduler thread: run due events, then idle until more are queued"""
+        while True:
+            try:
+                self._sched.run()
+            except Exception as e:
+                # A failed advance ends the run, but the thread stays up for the next one
+                self.log.exception("Scheduled section advance failed")
+                print(f"❌ Section advance failed: {e}")
+                self._plan_finished.set()
+            self._sched_delay(None)
+    
+    def _schedule_advance(self, delay: float, action: Callable, *args):
+        """Run action(*args) after delay seconds, replacing any pending advance"""
+        self._cancel_advance()
+        self._advance_event = self._sched.enter(delay, 1, action, args)
+        self._sched_wakeup.set()
+    
+    def _cancel_advance(self):
+        """Drop the pending advance, if any"""
+        event, self._advance_event = self._advance_event, None
+        if event is not None:
+            try:
+                self._sched.cancel(event)
+            except ValueError:
+                pass  # Already ran
+    
+    def _finish_plan(self):
+        """End an auto-advance run after its last section"""
+        print("\n🎉 REMIX COMPLETE!")
+        # Final cleanup
+        try:
+            self.sc_client.send_message("/mixer_cleanup", [])
+            print("🧹 Final cleanup completed")
+        except:
+            pass
+        self._resident_buffers.clear()
+        self._plan_finished.set()
+    
     def load_plan(self, json_file: str) -> bool:
         """Load JSON remix plan from file"""
         try:
-            with open(json_file, 'r', encoding='utf-8') as f:
-                self.plan_data = json.load(f)
+            if ORJSON_AVAILABLE:
+                plan_data = orjson.loads(Path(json_file).read_bytes())
+            else:
+                with open(json_file, 'r', encoding='utf-8') as f:
+                    plan_data = json.load(f)
+        except Exception as e:
+            print(f"❌ Error loading plan: {e}")
+            return False
+        
+        return self.load_plan_data(plan_data, json_file)
+    
+    def load_plan_data(self, plan_data: Dict[str, Any], source: str = "<memory>") -> bool:
+        """Load an already parsed remix plan"""
+        try:
+            self.plan_data = plan_data
             
-            print(f"📄 Loaded plan: {json_file}")
+            print(f"📄 Loaded plan: {source}")
             print(f"🎵 Theme: {self.plan_data.get('theme', 'unknown')}")
             print(f"🎤 Base: {self.plan_data.get('base_song', 'unknown')}")
             print(f"🎼 BPM: {self.plan_data.get('base_bpm', '?')}")
@@ -72,57 +273,136 @@ class DJPlanExecutor:
             sections = self.plan_data.get('sections', {})
             print(f"📊 Sections: {len(sections)}")
             
+            # Section keys carry their position ("00_intro", "01_verse", ...), so
+            # sorted order is play order; auto-advance just follows this map
+            section_keys = self._section_keys = sorted(sections)
+            self._next_section = dict(zip(section_keys, section_keys[1:] + [None]))
+            # Flattened in play order so buffer IDs are handed out in that order
+            self._section_stems = {key: self._flatten_section(sections[key])
+                                   for key in section_keys}
+            
+            self._prefetch_file_meta(sections)
             return True
             
         except Exception as e:
             print(f"❌ Error loading plan: {e}")
             return False
     
+    def _flatten_section(self, section_data: Dict[str, Any]) -> SectionStems:
+        """Pull the per-stem playback fields of a section into parallel lists"""
+        columns = SectionStems([], [], [], [], [], [])
+        for stem_type, stem_info in section_data.get('stems', {}).items():
+            song = stem_info['song']
+            # Adjust volume based on stem type for better mix
+            stem_volume = 0.7  # Base volume
+            if 'drums' in song.lower():
+                stem_volume = 0.8  # Drums slightly louder
+            elif 'vocal' in song.lower():
+                stem_volume = 0.9  # Vocals prominent
+            
+            columns.stem_types.append(stem_type)
+            columns.files.append(stem_info['file'])
+            columns.song_names.append(song.split('(')[0].strip())
+            columns.rates.append(float(stem_info.get('pitch_shift', 1.0)))  # Pitch shift is the playback rate
+            columns.volumes.append(stem_volume)
+            columns.buffer_ids.append(self._get_buffer_id(stem_info['file']))
+        
+        if columns.buffer_ids:
+            columns.has_deck_a = min(columns.buffer_ids) < 1100
+            columns.has_deck_b = max(columns.buffer_ids) >= 1100
+        return columns
+    
     def _get_buffer_id(self, file_path: str) -> int:
         """Get or create buffer ID for file"""
         if file_path in self.loaded_buffers:
             return self.loaded_buffers[file_path]
         
         buffer_id = self.next_buffer_id
+        assert isinstance(buffer_id, int) and buffer_id >= 1000
         self.next_buffer_id += 1
         self.loaded_buffers[file_path] = buffer_id
         return buffer_id
     
+    @staticmethod
+    def _stat_file(file_path: str) -> FileMeta:
+        """Resolve and stat a stem file"""
+        abs_path = os.path.abspath(file_path)
+        try:
+            size_mb = os.stat(abs_path).st_size / (1024 * 1024)
+        except OSError:
+            return FileMeta(abs_path, False, 0.0)
+        # Warm the header pages now so later duration probes hit the cache
+        _advise_header(abs_path)
+        return FileMeta(abs_path, True, size_mb)
+    
+    def _get_file_meta(self, file_path: str) -> FileMeta:
+        """Get the cached metadata for a file, stat'ing it on first use"""
+        meta = self._file_meta.get(file_path)
+        if meta is None:
+            meta = self._file_meta[file_path] = self._stat_file(file_path)
+        return meta
+    
+    def _prefetch_file_meta(self, sections: Dict[str, Any]):
+        """Resolve and stat every stem file of the plan in one concurrent pass"""
+        paths = {stem_info['file']
+                 for section_data in sections.values()
+                 for stem_info in section_data.get('stems', {}).values()}
+        paths.difference_update(self._file_meta)
+        
+        if paths:
+            with ThreadPoolExecutor(max_workers=min(16, len(paths))) as executor:
+                self._file_meta.update(zip(paths, executor.map(self._stat_file, paths)))
+    
     def _get_audio_duration(self, file_path: str) -> float:
-        """Get duration of audio file in seconds"""
+        """Get duration of audio file in seconds (each file is probed once)"""
+        meta = self._get_file_meta(file_path)
+        if meta.duration is None:
+            meta.duration = self._probe_audio_duration(meta)
+        return meta.duration
+    
+    def _probe_audio_duration(self, meta: FileMeta) -> float:
+        """Read the duration of an audio file from its header"""
+        if not meta.exists:
+            print(f"⚠️  File not found for duration check: {meta.abs_path}")
+            return 30.0  # Default fallback
+        
         try:
-            full_path = Path(file_path).absolute()
-            if not full_path.exists():
-                print(f"⚠️  File not found for duration check: {full_path}")
-                return 30.0  # Default fallback
+            # Formats libsndfile doesn't list (e.g. mp3 on older builds) go through ffprobe
+            suffix = os.path.splitext(meta.abs_path)[1].lower()
+            if AUDIOFILE_AVAILABLE and suffix not in SOUNDFILE_EXTENSIONS:
+                return audiofile.duration(meta.abs_path, sloppy=True)
             
-            # Try soundfile first (faster)
             if SOUNDFILE_AVAILABLE:
-                try:
-                    info = sf.info(str(full_path))
-                    duration = info.frames / info.samplerate
-                    return duration
-                except Exception as e:
-                    print(f"⚠️  Soundfile duration failed: {e}")
-            
-            # Try librosa as fallback
-            if LIBROSA_AVAILABLE:
-                try:
-                    duration = librosa.get_duration(filename=str(full_path))
-                    return duration
-                except Exception as e:
-                    print(f"⚠️  Librosa duration failed: {e}")
-            
-            # If no audio libraries available, use rough estimate based on file size
-            file_size_mb = full_path.stat().st_size / (1024 * 1024)
-            # Rough estimate: ~1MB per 8 seconds for 44.1kHz stereo (varies by compression)
-            estimated_duration = file_size_mb * 8
-            print(f"⚠️  Using file size estimate: {estimated_duration:.1f}s")
-            return estimated_duration
+                info = sf.info(meta.abs_path)
+                return info.frames / info.samplerate
             
+            print("⚠️  soundfile not installed, using default 30s")
         except Exception as e:
             print(f"⚠️  Duration detection failed: {e}, using default 30s")
-            return 30.0
+        
+        return 30.0
+    
+    def _prefetch_durations(self, sections: Dict[str, Any]):
+        """Probe the durations of all sections concurrently to warm the cache"""
+        paths = set()
+        for section_data in sections.values():
+            stems = section_data.get('stems', {})
+            if stems and not self._embedded_duration(section_data):
+                file_path = next(iter(stems.values()))['file']
+                if self._get_file_meta(file_path).duration is None:
+                    paths.add(file_path)
+        
+        if paths:
+            # Header reads are I/O bound and release the GIL, so threads overlap them
+            with ThreadPoolExecutor(max_workers=min(16, len(paths))) as executor:
+                list(executor.map(self._get_audio_duration, paths))
+    
+    @staticmethod
+    def _embedded_duration(section_data: Dict[str, Any]) -> Optional[float]:
+        """Duration already recorded in the plan by the generator, if any"""
+        stems = section_data.get('stems', {})
+        first_stem = next(iter(stems.values()), {})
+        return section_data.get('duration') or first_stem.get('duration')
     
     def _get_section_duration(self, section_data: Dict[str, Any]) -> float:
         """Calculate the duration of a section based on its stems"""
@@ -130,101 +410,81 @@ class DJPlanExecutor:
         if not stems:
             return 30.0  # Default fallback
         
-        # Get duration of the first stem file (they should all be similar length)
-        first_stem = list(stems.values())[0]
-        file_path = first_stem['file']
-        
-        duration = self._get_audio_duration(file_path)
+        # Trust a duration the plan generator already computed, else probe
+        # the first stem file (they should all be similar length)
+        duration = self._embedded_duration(section_data)
+        if duration:
+            duration = float(duration)
+        else:
+            duration = self._get_audio_duration(next(iter(stems.values()))['file'])
         print(f"📏 Section duration: {duration:.1f}s")
         return duration
     
-    def _load_stem_buffer(self, stem_info: Dict[str, Any], stem_type: str) -> int:
-        """Load individual stem buffer with memory optimization"""
-        file_path = stem_info['file']
-        song_name = stem_info['song'].split('(')[0].strip()
-        
+    def _load_stem_buffer(self, file_path: str, song_name: str, stem_type: str,
+                          bundle: osc_bundle_builder.OscBundleBuilder = None) -> int:
+        """Load individual stem buffer with memory optimization (queued on bundle if given)"""
         buffer_id = self._get_buffer_id(file_path)
         stem_name = f"{song_name}_{stem_type}"
         
         # Send load command to SuperCollider
         try:
-            full_path = Path(file_path).absolute()
-            if not full_path.exists():
-                print(f"❌ File not found: {full_path}")
+            meta = self._get_file_meta(file_path)
+            if not meta.exists:
+                print(f"❌ File not found: {meta.abs_path}")
                 return None
             
             # Check file size for memory awareness
-            file_size_mb = full_path.stat().st_size / (1024 * 1024)
+            file_size_mb = meta.size_mb
             if file_size_mb > 50:  # Warn about large files
                 print(f"⚠️  Large file: {stem_name} ({file_size_mb:.1f} MB)")
                 
-            self.sc_client.send_message("/load_buffer", [
+            message = _osc_message("/load_buffer", [
                 buffer_id,
-                str(full_path),
+                meta.abs_path,
                 stem_name
             ])
-            print(f"📥 Loading: {stem_name} → buffer {buffer_id} ({file_size_mb:.1f}MB)")
+            if bundle is not None:
+                bundle.add_content(message)
+            else:
+                self._send_with_retry(message)
+            self.log.debug("📥 Loading: %s → buffer %d (%.1fMB)", stem_name, buffer_id, file_size_mb)
             return buffer_id
             
         except Exception as e:
             print(f"❌ Error loading {stem_name}: {e}")
             return None
     
-    def _play_stem_buffer(self, buffer_id: int, stem_info: Dict[str, Any], volume: float = 0.8):
-        """Play stem buffer with correct rate/pitch"""
-        if buffer_id is None:
-            print("❌ Invalid buffer ID (None)")
-            return
-            
-        try:
-            pitch_shift = stem_info.get('pitch_shift', 1.0)
-            rate = pitch_shift  # Use pitch_shift as playback rate
-            loop = 1  # Always loop for continuous playback
-            start_pos = 0.0  # Start from beginning
-            
-            # Validate parameters
-            if not isinstance(buffer_id, int) or buffer_id < 1000:
-                print(f"❌ Invalid buffer ID: {buffer_id}")
-                return
-                
-            # Match SuperCollider OSC message format exactly:
-            # /play_stem [bufferID, rate, volume, loop, startPos]
-            # Wait to ensure buffer is loaded, with longer wait for first buffer
-            if buffer_id == 1000:
-                time.sleep(1.5)  # Extra time for first buffer to avoid race condition
-                print(f"⏳ Extra wait for first buffer {buffer_id}")
-            else:
-                time.sleep(0.5)
-            
-            message_params = [
-                int(buffer_id),  # Ensure integer
-                float(rate),
-                float(volume), 
-                int(loop),
-                float(start_pos)
-            ]
-            
-            print(f"🎵 Sending OSC: /play_stem {message_params}")
-            
-            # Send message with retry logic to handle SuperCollider timing issues
-            max_retries = 3
-            for attempt in range(max_retries):
-                try:
-                    self.sc_client.send_message("/play_stem", message_params)
-                    break  # Success, exit retry loop
-                except Exception as e:
-                    if attempt < max_retries - 1:
-                        print(f"⚠️  OSC send attempt {attempt + 1} failed, retrying...")
-                        time.sleep(0.5)
-                    else:
-                        raise e
-            
-            song_name = stem_info['song'].split('(')[0].strip()
-            rate_info = f"(rate: {rate:.3f})" if rate != 1.0 else ""
-            print(f"▶️  Playing: {song_name} {rate_info} vol:{volume:.2f}")
-            
-        except Exception as e:
-            print(f"❌ Error playing buffer {buffer_id}: {e}")
+    def _send_with_retry(self, content):
+        """Send an OSC message or bundle, retrying on transient socket errors"""
+        max_retries = 3
+        for attempt in range(max_retries):
+            try:
+                self.sc_client.send(content)
+                break  # Success, exit retry loop
+            except Exception as e:
+                if attempt < max_retries - 1:
+                    print(f"⚠️  OSC send attempt {attempt + 1} failed, retrying...")
+                    time.sleep(0.5)
+                else:
+                    raise e
+    
+    def _play_section_stems(self, active_buffers: List[tuple],
+                            bundle: osc_bundle_builder.OscBundleBuilder):
+        """Queue one /play_section message that starts every loaded stem of a section
+        
+        /play_section [id1..idN, rate1..rateN, vol1..volN] makes the server create all
+        stem synths in a single bundle, so they start on the same tick. Buffer IDs come
+        from _get_buffer_id and rates/volumes from _flatten_section, already typed.
+        """
+        buffer_ids, rates, volumes, song_names = zip(*active_buffers)
+        message_params = [*buffer_ids, *rates, *volumes]
+        bundle.add_content(_osc_message("/play_section", message_params))
+        
+        if self.log.isEnabledFor(logging.DEBUG):
+            self.log.debug("🎵 Queued OSC: /play_section %s", message_params)
+            for song_name, rate, volume in zip(song_names, rates, volumes):
+                rate_info = f"(rate: {rate:.3f})" if rate != 1.0 else ""
+                self.log.debug("▶️  Playing: %s %s vol:%.2f", song_name, rate_info, volume)
     
     def play_section(self, section_key: str, auto_advance: bool = False):
         """Play a specific section from the plan"""
@@ -237,66 +497,87 @@ class DJPlanExecutor:
             print(f"❌ Section '{section_key}' not found")
             return False
         
+        started = time.perf_counter()
         section = sections[section_key]
         section_type = section.get('type', 'unknown')
-        stems = section.get('stems', {})
+        columns = self._section_stems[section_key]
         
         print(f"\n🎵 PLAYING SECTION: {section_key.upper()} ({section_type})")
         print("=" * 50)
         
-        # Stop any currently playing stems first (memory optimization)
-        try:
-            self.sc_client.send_message("/mixer_cleanup", [])
-            print("🧹 Cleaned previous stems for memory optimization")
-            time.sleep(0.5)
-        except:
-            pass
+        # Stopping, freeing, every buffer load and the /sync go out as one bundle;
+        # SuperCollider handles its messages in order, so no pause is needed between them
+        load_bundle = osc_bundle_builder.OscBundleBuilder(osc_bundle_builder.IMMEDIATELY)
         
-        # Load and play stems one by one for memory efficiency
-        active_buffers = []
+        # Stop any currently playing stems first; their buffers stay loaded for reuse
+        load_bundle.add_content(_osc_message("/stop_all_stems", []))
+        print("⏹️  Stopping previous stems")
+        
+        # Free only the buffers this section doesn't use (memory optimization)
+        section_buffers = set(columns.buffer_ids)
+        for buffer_id in sorted(self._resident_buffers - section_buffers):
+            load_bundle.add_content(_osc_message("/free_buffer", [buffer_id]))
+        self._resident_buffers &= section_buffers
         
-        for stem_type, stem_info in stems.items():
-            buffer_id = self._load_stem_buffer(stem_info, stem_type)
-            if buffer_id is not None and buffer_id > 0:
-                active_buffers.append((buffer_id, stem_info))
-                print(f"✅ Buffer ready: {buffer_id}")
+        # Load only this section's stems that aren't already in memory
+        active_buffers = []
+        loading = False
+        
+        for stem_type, file_path, buffer_id, song_name, rate, volume in zip(
+                columns.stem_types, columns.files, columns.buffer_ids,
+                columns.song_names, columns.rates, columns.volumes):
+            if buffer_id in self._resident_buffers:
+                self.log.debug("♻️  Reusing: %s_%s → buffer %d", song_name, stem_type, buffer_id)
+            elif self._load_stem_buffer(file_path, song_name, stem_type, load_bundle) is not None:
+                self._resident_buffers.add(buffer_id)
+                loading = True
             else:
                 print(f"❌ Failed to prepare buffer for {stem_type}")
+                continue
+            active_buffers.append((buffer_id, rate, volume, song_name))
+            self.log.debug("✅ Buffer ready: %d", buffer_id)
+        
+        if loading:
+            # Wait for all buffers to load
+            print("⏳ Waiting for buffers to load...")
+            if not self._wait_for_sync(load_bundle):
+                print(f"⚠️  No /synced reply within {SYNC_TIMEOUT:.0f}s, starting stems anyway")
+        else:
+            try:
+                self._send_with_retry(load_bundle.build())
+            except Exception as e:
+                print(f"⚠️  Could not stop previous stems: {e}")
         
-        # Wait for all buffers to load
-        print("⏳ Waiting for buffers to load...")
-        time.sleep(3)  # Longer wait to ensure all buffers are ready
-        
-        # Now play all loaded stems with proper volumes
-        for buffer_id, stem_info in active_buffers:
-            # Adjust volume based on stem type for better mix
-            stem_volume = 0.7  # Base volume
-            if 'drums' in stem_info.get('song', '').lower():
-                stem_volume = 0.8  # Drums slightly louder
-            elif 'vocal' in stem_info.get('song', '').lower():
-                stem_volume = 0.9  # Vocals prominent
-            
-            self._play_stem_buffer(buffer_id, stem_info, stem_volume)
-            time.sleep(0.2)  # Small delay between stems
+        # Now play all loaded stems with proper volumes from one message, in a
+        # timestamped bundle so they start together instead of drifting apart
+        start_bundle = osc_bundle_builder.OscBundleBuilder(time.time() + STEM_START_LATENCY)
+        if active_buffers:
+            self._play_section_stems(active_buffers, start_bundle)
         
         # Set initial crossfade (deck A active for stems below 1100, deck B for above)
+        # Decks were worked out at plan load; rescan only if some stem failed to load
+        if len(active_buffers) == len(columns.buffer_ids):
+            has_deck_a, has_deck_b = columns.has_deck_a, columns.has_deck_b
+        else:
+            has_deck_a = any(buf_id < 1100 for buf_id, *_ in active_buffers)
+            has_deck_b = any(buf_id >= 1100 for buf_id, *_ in active_buffers)
+        
+        deck_a_vol = 0.8 if has_deck_a else 0.0
+        deck_b_vol = 0.8 if has_deck_b else 0.0
+        
+        start_bundle.add_content(_osc_message("/crossfade_levels", [deck_a_vol, deck_b_vol]))
+        print(f"🎚️  Crossfade: A:{deck_a_vol} B:{deck_b_vol}")
+        
         try:
-            # Determine which deck to use based on buffer IDs
-            has_deck_a = any(buf_id < 1100 for buf_id, _ in active_buffers)
-            has_deck_b = any(buf_id >= 1100 for buf_id, _ in active_buffers)
-            
-            deck_a_vol = 0.8 if has_deck_a else 0.0
-            deck_b_vol = 0.8 if has_deck_b else 0.0
-            
-            self.sc_client.send_message("/crossfade_levels", [deck_a_vol, deck_b_vol])
-            print(f"🎚️  Crossfade: A:{deck_a_vol} B:{deck_b_vol}")
+            self._send_with_retry(start_bundle.build())
         except Exception as e:
-            print(f"⚠️  Crossfade error: {e}")
+            print(f"❌ Error starting stems: {e}")
         
-        print(f"✅ Section started with {len(active_buffers)} stems")
+        self.log.info("✅ Section %s: %d stems in %.2fs",
+                      section_key, len(active_buffers), time.perf_counter() - started)
         
         # Show what buffers are now active
-        active_buffer_ids = [buf_id for buf_id, _ in active_buffers]
+        active_buffer_ids = [buf_id for buf_id, *_ in active_buffers]
         print(f"📊 Active buffer IDs: {active_buffer_ids}")
         
         # Send a status check to see what SuperCollider reports
@@ -311,27 +592,13 @@ class DJPlanExecutor:
             # Get the actual duration of this section
             section_duration = self._get_section_duration(section)
             
-            structure = self.plan_data.get('structure', [])
-            current_idx = None
-            
-            # Find current section in structure
-            for i, struct_type in enumerate(structure):
-                if section_key.endswith(struct_type) or struct_type in section_key:
-                    current_idx = i
-                    break
-            
-            if current_idx is not None and current_idx + 1 < len(structure):
-                next_section_type = structure[current_idx + 1]
-                # Find next section with this type
-                next_key = None
-                for key in sections.keys():
-                    if next_section_type in key and key > section_key:
-                        next_key = key
-                        break
-                
-                if next_key:
-                    print(f"⏭️  Auto-advancing to {next_key} in {section_duration:.1f} seconds...")
-                    threading.Timer(section_duration, lambda: self.play_section(next_key, True)).start()
+            next_key = self._next_section.get(section_key)
+            if next_key:
+                print(f"⏭️  Auto-advancing to {next_key} in {section_duration:.1f} seconds...")
+                self._schedule_advance(section_duration, self.play_section, next_key, True)
+            else:
+                print(f"🏁 Last section, finishing in {section_duration:.1f} seconds...")
+                self._schedule_advance(section_duration, self._finish_plan)
         
         return True
     
@@ -342,11 +609,11 @@ class DJPlanExecutor:
             return
         
         sections = self.plan_data.get('sections', {})
-        structure = self.plan_data.get('structure', [])
         
         # Calculate total estimated duration based on actual file lengths
+        self._prefetch_durations(sections)
         total_duration = 0
-        for section_key in sorted(sections.keys()):
+        for section_key in self._section_keys:
             section_duration = self._get_section_duration(sections[section_key])
             total_duration += section_duration
         
@@ -356,43 +623,18 @@ class DJPlanExecutor:
         print("💾 Memory: Buffers freed between sections")
         print("=" * 60)
         
-        # Play sections in order
-        section_keys = sorted(sections.keys())
-        
-        for i, section_key in enumerate(section_keys):
-            auto_advance = (i < len(section_keys) - 1)  # Don't auto-advance on last section
-            section_data = sections[section_key]
-            
-            self.play_section(section_key, auto_advance)
-            
-            if not auto_advance:
-                print("\n🎉 REMIX COMPLETE!")
-                # Final cleanup
-                try:
-                    self.sc_client.send_message("/mixer_cleanup", [])
-                    print("🧹 Final cleanup completed")
-                except:
-                    pass
-                break
-            else:
-                # Wait for actual section duration
-                section_duration = self._get_section_duration(section_data)
-                print(f"⏳ Playing for {section_duration:.1f} seconds...")
-                
-                # Wait most of the time, then check memory
-                wait_time = max(5, section_duration - 5)  # Wait at least 5s, but leave 5s for status check
-                time.sleep(wait_time)
-                
-                # Check server status before next section
-                try:
-                    self.sc_client.send_message("/get_status", [])
-                except:
-                    pass
-                
-                # Wait remaining time
-                remaining_time = section_duration - wait_time
-                if remaining_time > 0:
-                    time.sleep(remaining_time)
+        # Sections advance on the scheduler thread; wait here until the last one ends
+        self._cancel_advance()
+        self._plan_finished.clear()
+        if self._section_keys and self.play_section(self._section_keys[0], auto_advance=True):
+            try:
+                while not self._plan_finished.wait(1.0):
+                    if not self._sched_thread.is_alive():
+                        print("❌ Scheduler thread stopped, ending playback")
+                        break
+            except KeyboardInterrupt:
+                self._cancel_advance()
+                raise
     
     def show_plan_info(self):
         """Display detailed plan information"""
@@ -413,6 +655,7 @@ class DJPlanExecutor:
             print(f"  {i+1:2d}. {section_type}")
         
         sections = self.plan_data.get('sections', {})
+        self._prefetch_durations(sections)
         print(f"\\nDetailed Sections ({len(sections)}):")
         
         for section_key, section_data in sorted(sections.items()):
@@ -422,25 +665,83 @@ class DJPlanExecutor:
             
             print(f"\\n  📊 {section_key.upper()} ({section_type}) - {duration:.1f}s")
             
-            for stem_type, stem_info in stems.items():
-                song = stem_info['song'].split('(')[0].strip()
+            # Song names and rates were flattened at plan load
+            columns = self._section_stems[section_key]
+            for (stem_type, stem_info), song, pitch in zip(stems.items(), columns.song_names, columns.rates):
                 bpm = stem_info.get('bpm', '?')
                 key = stem_info.get('key', '?')
-                pitch = stem_info.get('pitch_shift', 1.0)
                 timestretch = "🔄" if stem_info.get('needs_timestretch', False) else ""
                 
                 pitch_info = f"×{pitch:.3f}" if pitch != 1.0 else "×1.000"
                 print(f"    {stem_type:6s}: {song:20s} {str(bpm):>3s}bpm {key:2s} {pitch_info} {timestretch}")
     
+    def _cmd_info(self, args: List[str]):
+        """Show plan details"""
+        self.show_plan_info()
+    
+    def _cmd_list(self, args: List[str]):
+        """List all sections"""
+        sections = self.plan_data.get('sections', {})
+        print("\\n📋 Available sections:")
+        for i, key in enumerate(self._section_keys):
+            section_type = sections[key].get('type', 'unknown')
+            stem_count = len(sections[key].get('stems', {}))
+            print(f"  {i+1:2d}. {key} ({section_type}, {stem_count} stems)")
+    
+    def _cmd_play(self, args: List[str]):
+        """Play a section by number or partial name"""
+        if not args:
+            print("❌ Usage: play <section>")
+            return
+        
+        section_keys = self._section_keys
+        section_arg = args[0]
+        # Allow playing by number or name
+        if section_arg.isdigit():
+            idx = int(section_arg) - 1
+            if 0 <= idx < len(section_keys):
+                self.play_section(section_keys[idx])
+            else:
+                print(f"❌ Invalid section number: {section_arg}")
+        else:
+            # Find section by partial name match
+            matches = [key for key in section_keys if section_arg in key.lower()]
+            if len(matches) == 1:
+                self.play_section(matches[0])
+            elif len(matches) > 1:
+                print(f"❌ Multiple matches: {matches}")
+            else:
+                print(f"❌ Section not found: {section_arg}")
+    
+    def _cmd_full(self, args: List[str]):
+        """Play the full plan automatically"""
+        self.play_full_plan()
+    
+    def _cmd_stop(self, args: List[str]):
+        """Stop all audio and free memory"""
+        self._cancel_advance()
+        try:
+            self.sc_client.send_message("/mixer_cleanup", [])
+            print("⏹️  Stopped all audio and freed memory")
+            # Clear our tracking too (buffer IDs stay assigned to their files)
+            self._resident_buffers.clear()
+        except Exception as e:
+            print(f"❌ Error stopping: {e}")
+    
+    def _cmd_status(self, args: List[str]):
+        """Ask SuperCollider to print its status"""
+        try:
+            self.sc_client.send_message("/get_status", [])
+            print("📊 Requested server status (check SuperCollider window)")
+        except Exception as e:
+            print(f"❌ Error requesting status: {e}")
+    
     def interactive_mode(self):
         """Interactive section selection"""
         if not self.plan_data:
             print("❌ No plan loaded")
             return
         
-        sections = self.plan_data.get('sections', {})
-        section_keys = sorted(sections.keys())
-        
         print(f"\\n🎛️ INTERACTIVE PLAN EXECUTION")
         print("Available commands:")
         print("  info           - Show plan details")
@@ -458,53 +759,13 @@ class DJPlanExecutor:
                 if not cmd:
                     continue
                 
-                parts = cmd.split()
-                command = parts[0]
-                
+                command, *args = cmd.split()
                 if command == "quit":
                     break
-                elif command == "info":
-                    self.show_plan_info()
-                elif command == "list":
-                    print("\\n📋 Available sections:")
-                    for i, key in enumerate(section_keys):
-                        section_type = sections[key].get('type', 'unknown')
-                        stem_count = len(sections[key].get('stems', {}))
-                        print(f"  {i+1:2d}. {key} ({section_type}, {stem_count} stems)")
-                elif command == "play" and len(parts) >= 2:
-                    section_arg = parts[1]
-                    # Allow playing by number or name
-                    if section_arg.isdigit():
-                        idx = int(section_arg) - 1
-                        if 0 <= idx < len(section_keys):
-                            self.play_section(section_keys[idx])
-                        else:
-                            print(f"❌ Invalid section number: {section_arg}")
-                    else:
-                        # Find section by partial name match
-                        matches = [key for key in section_keys if section_arg in key.lower()]
-                        if len(matches) == 1:
-                            self.play_section(matches[0])
-                        elif len(matches) > 1:
-                            print(f"❌ Multiple matches: {matches}")
-                        else:
-                            print(f"❌ Section not found: {section_arg}")
-                elif command == "full":
-                    self.play_full_plan()
-                elif command == "stop":
-                    try:
-                        self.sc_client.send_message("/mixer_cleanup", [])
-                        print("⏹️  Stopped all audio and freed memory")
-                        # Clear our tracking too
-                        self.loaded_buffers.clear()
-                    except Exception as e:
-                        print(f"❌ Error stopping: {e}")
-                elif command == "status":
-                    try:
-                        self.sc_client.send_message("/get_status", [])
-                        print("📊 Requested server status (check SuperCollider window)")
-                    except Exception as e:
-                        print(f"❌ Error requesting status: {e}")
+                
+                handler = self._handlers.get(command)
+                if handler:
+                    handler(args)
                 else:
                     print("❌ Unknown command")
                     
@@ -523,8 +784,14 @@ def main():
     parser.add_argument('--mode', choices=['interactive', 'full', 'info'], default='interactive',
                         help='Execution mode')
     
+    parser.add_argument('--verbose', action='store_true', help='Log every stem load and play')
+    
     args = parser.parse_args()
     
+    # Per-stem detail is DEBUG so the OSC send path stays quiet by default
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO,
+                        format='%(message)s')
+    
     executor = DJPlanExecutor(args.host, args.port)
     
     if not executor.load_plan(args.json_file):
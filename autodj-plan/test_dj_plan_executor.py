@@ -4,15 +4,19 @@ Quick test of the updated dj_plan_executor.py
 Tests OSC message compatibility with supercollider_audio_server_minimal.scd
 """
 
+import os
 import sys
-from pathlib import Path
-from dj_plan_executor import DJPlanExecutor
+
+_BAR50 = "=" * 50
 
 def test_executor():
     """Test the DJ Plan Executor with sample data"""
     
     print("🧪 Testing Updated DJ Plan Executor")
-    print("=" * 50)
+    print(_BAR50)
+    
+    # Imported here so loading this module doesn't pull in the OSC/audio stack
+    from dj_plan_executor import DJPlanExecutor
     
     # Initialize executor
     try:
@@ -29,11 +33,11 @@ def test_executor():
         "remix_dramatic_example.json"
     ]
     
-    test_plan = None
-    for plan_file in plan_files:
-        if Path(plan_file).exists():
-            test_plan = plan_file
-            break
+    # One directory listing instead of a stat per candidate
+    wanted = set(plan_files)
+    with os.scandir(".") as entries:
+        present = {entry.name for entry in entries if entry.name in wanted and entry.is_file()}
+    test_plan = next((plan_file for plan_file in plan_files if plan_file in present), None)
     
     if not test_plan:
         print("❌ No test plan files found")
@@ -68,9 +72,9 @@ def test_executor():
             
             # Test OSC message formatting (without actually sending)
             print("✅ OSC /load_buffer format: [buffer_id, file_path, stem_name]")
-            print("✅ OSC /play_stem format: [buffer_id, rate, volume, loop, start_pos]")
+            print("✅ OSC /play_section format: [buffer_ids..., rates..., volumes...]")
             print("✅ OSC /crossfade_levels format: [deck_a_vol, deck_b_vol]")
-            print("✅ Memory optimization: /mixer_cleanup before sections")
+            print("✅ Memory optimization: /stop_all_stems + /free_buffer between sections")
     
     print("\n🎉 All tests completed successfully!")
     print("💡 The executor is now compatible with supercollider_audio_server_minimal.scd")
@@ -4,21 +4,86 @@ Interactive TSP AutoDJ with Real-time Stem Swapping
 Allows dynamic stem replacement during playback with key/BPM adjustment
 """
 
+import hashlib
+import os
 import numpy as np
 import librosa
 import soundfile as sf
 import pyaudio
-from threading import Thread, Event, Lock
+from threading import Thread, Event
 import time
-import queue
 from pathlib import Path
 from typing import List, Optional, Tuple, Dict
 import sys
 import select
+import tempfile
 import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass, field
 from tsp_autodj import TSPAutoDJ, SongMetadata, CamelotWheel, BPMDistance
 
+# Numba compiles the mix + soft-clip kernel; plain NumPy is used without it
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    
+    def njit(*args, **kwargs):
+        def decorator(func):
+            return func
+        return decorator
+
+STEM_TYPES = ('bass', 'drums', 'vocals', 'piano', 'other')
+STEM_INDEX = {stem_type: index for index, stem_type in enumerate(STEM_TYPES)}  # Slot in the mix arrays
+STREAM_PRELOAD_SECONDS = 2.0  # Decoded before a swapped-in stem starts playing
+STREAM_BLOCK_FRAMES = 65536  # Decoder thread read size for the rest of the stem
+INT16_TO_FLOAT = 1.0 / 32768.0  # Active stems are stored as int16 to halve mix bandwidth
+STEM_CACHE_MAX_BYTES = 4 * 1024 ** 3  # On-disk stem cache size; least recently used entries go first
+
+# Simplified key to semitone mapping (Camelot wheel); unknown keys count as 0
+KEY_TO_SEMITONE = {
+    '1A': 0, '1B': 3, '2A': 7, '2B': 10, '3A': 2, '3B': 5,
+    '4A': 9, '4B': 0, '5A': 4, '5B': 7, '6A': 11, '6B': 2,
+    '7A': 6, '7B': 9, '8A': 1, '8B': 4, '9A': 8, '9B': 11,
+    '10A': 3, '10B': 6, '11A': 10, '11B': 1, '12A': 5, '12B': 8
+}
+
+def _build_key_shift_table() -> np.ndarray:
+    """Shortest semitone shift between every pair of keys, indexed by CamelotWheel.key_index"""
+    semitones = np.zeros(CamelotWheel.UNKNOWN_KEY_INDEX + 1, dtype=np.int16)
+    for key, position in CamelotWheel.WHEEL_POSITIONS.items():
+        semitones[position] = KEY_TO_SEMITONE[key]
+    # Shortest path, considering octave wrapping: -5..6
+    diff = (semitones[None, :] - semitones[:, None]) % 12
+    diff[diff > 6] -= 12
+    return diff.astype(np.int8)
+
+KEY_SHIFT_TABLE = _build_key_shift_table()
+
+# Frequency ratio of every whole-semitone shift KEY_SHIFT_TABLE can produce
+SEMITONE_RATIOS = {n: 2.0 ** (n / 12.0) for n in range(-6, 7)}
+
+@njit(fastmath=True, cache=True)
+def _soft_clip(x):
+    """Padé approximation of tanh, clamped at |x| = 3 where it reaches exactly ±1"""
+    x = min(max(x, -3.0), 3.0)
+    return x * (27.0 + x * x) / (27.0 + 9.0 * x * x)
+
+@njit(fastmath=True, cache=True)
+def _mix_kernel(out, chunks, lengths, volumes, gain):
+    """Sum the staged stem chunks and soft-clip them into out in a single pass"""
+    for i in range(out.shape[0]):
+        left = 0.0
+        right = 0.0
+        for k in range(chunks.shape[0]):
+            if i < lengths[k]:
+                left += chunks[k, i, 0] * volumes[k]
+                right += chunks[k, i, 1] * volumes[k]
+        out[i, 0] = _soft_clip(left * gain) * 0.95
+        out[i, 1] = _soft_clip(right * gain) * 0.95
+
 @dataclass
 class StemInfo:
     """Information about an individual stem"""
@@ -30,11 +95,122 @@ class StemInfo:
     duration: float
     energy: float
 
+class StreamingTimeStretch:
+    """Phase-vocoder time stretch computed chunk by chunk during playback
+    
+    Output sample p plays source sample p * rate. Only the STFT frames around the
+    play position are transformed, so a swap doesn't stretch the whole stem up
+    front and no stretched copy is stored. Phase is carried from frame to frame
+    as in librosa's phase_vocoder.
+    """
+    
+    def __init__(self, rate: float, n_fft: int = 1024, hop_length: int = 256):
+        self.rate = rate
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+        self.window = np.hanning(n_fft + 1)[:-1, None]  # Periodic Hann, per channel
+        self._phase_advance = np.linspace(0, np.pi * hop_length, n_fft // 2 + 1)[:, None]
+        # Overlap-added squared windows sum to this constant, undone at output
+        self._ola_gain = float((self.window ** 2).sum()) / hop_length
+        self.position = -1  # Output sample the next read starts at
+    
+    def _seek(self, position: int):
+        """Restart the vocoder so it can produce output from position"""
+        # Start a window's worth of frames early so position gets full overlap
+        first_frame = max(0, position // self.hop_length - (self.n_fft // self.hop_length - 1))
+        self._next_frame = first_frame
+        self._skip = position - first_frame * self.hop_length  # Warm-up samples to drop
+        self._ready = np.zeros((0, 2))  # Finished samples not yet read, from self.position
+        self._phase = None
+        self._spectra = {}
+        self._ola = np.zeros((self.n_fft, 2))
+        self.position = position
+    
+    def _spectrum(self, source: np.ndarray, available: int, frame: int) -> Optional[np.ndarray]:
+        """STFT of one analysis frame of the int16 source, or None past the decoded end
+        
+        While the decoder is still filling the source, a frame is only used (and
+        cached) once all of it is decoded; only the source's final frames are
+        zero padded.
+        """
+        spectrum = self._spectra.get(frame)
+        if spectrum is None:
+            start = frame * self.hop_length
+            if start >= available or (start + self.n_fft > available and available < len(source)):
+                return None
+            segment = np.zeros((self.n_fft, 2))
+            samples = source[start:min(start + self.n_fft, available)]
+            segment[:len(samples)] = samples * INT16_TO_FLOAT
+            spectrum = np.fft.rfft(segment * self.window, axis=0)
+            # Consecutive output frames only ever look at the last couple of analysis frames
+            if len(self._spectra) > 2:
+                self._spectra.pop(min(self._spectra))
+            self._spectra[frame] = spectrum
+        return spectrum
+    
+    def _synthesize(self, source: np.ndarray, available: int) -> Optional[np.ndarray]:
+        """Render the next output frame and return the hop_length samples it completes"""
+        time_step = self._next_frame * self.rate
+        frame = int(time_step)
+        alpha = time_step - frame
+        
+        current = self._spectrum(source, available, frame)
+        if current is None:
+            return None
+        following = self._spectrum(source, available, frame + 1)
+        if following is None:
+            if available < len(source):
+                return None  # Wait for the decoder rather than guess the next frame
+            following = current
+        
+        if self._phase is None:
+            self._phase = np.angle(current)
+        magnitude = (1.0 - alpha) * np.abs(current) + alpha * np.abs(following)
+        self._ola += np.fft.irfft(magnitude * np.exp(1j * self._phase), n=self.n_fft, axis=0) * self.window
+        
+        # Advance the phase by the measured per-bin frequency
+        delta = np.angle(following) - np.angle(current) - self._phase_advance
+        delta -= 2.0 * np.pi * np.round(delta / (2.0 * np.pi))
+        self._phase += self._phase_advance + delta
+        
+        # The first hop_length samples get no more overlap from later frames
+        done = self._ola[:self.hop_length] / self._ola_gain
+        self._ola = np.roll(self._ola, -self.hop_length, axis=0)
+        self._ola[-self.hop_length:] = 0.0
+        self._next_frame += 1
+        return done
+    
+    def read(self, source: np.ndarray, available: int, position: int, frame_count: int) -> Optional[np.ndarray]:
+        """Stretched (frames, 2) int16 audio starting at output sample position"""
+        if position != self.position:
+            self._seek(position)
+        
+        blocks = [self._ready]
+        produced = len(self._ready)
+        while produced < frame_count:
+            block = self._synthesize(source, available)
+            if block is None:
+                break
+            if self._skip:
+                dropped = min(self._skip, len(block))
+                block = block[dropped:]
+                self._skip -= dropped
+            blocks.append(block)
+            produced += len(block)
+        
+        audio = np.concatenate(blocks)
+        self._ready = audio[frame_count:]
+        audio = audio[:frame_count]
+        if not len(audio):
+            return None
+        self.position = position + len(audio)
+        return (np.clip(audio, -1.0, 1.0) * 32767.0).astype(np.int16)
+
 @dataclass
 class ActiveStem:
     """Currently active stem with processing info"""
     stem_info: StemInfo
-    audio_data: np.ndarray
+    audio_data: np.ndarray  # (samples, 2) int16
     original_bpm: float
     target_bpm: float
     original_key: str
@@ -42,6 +218,56 @@ class ActiveStem:
     volume: float = 1.0
     pitch_shift: float = 0.0  # semitones
     tempo_ratio: float = 1.0
+    decoded_frames: int = -1  # Frames of audio_data filled so far (-1 = all of it)
+    stretcher: Optional[StreamingTimeStretch] = None  # Set when tempo_ratio != 1.0
+    
+    def __post_init__(self):
+        if self.decoded_frames < 0:
+            self.decoded_frames = len(self.audio_data)
+
+class CommandRing:
+    """Lock-free single-producer/single-consumer ring of mixer commands
+    
+    Slots are preallocated; the producer (CLI thread) fills a slot before bumping
+    the write index and the consumer (mixer thread) empties it before bumping the
+    read index. Each index has a single writer and int assignment is atomic, so
+    neither side ever takes a mutex.
+    """
+    
+    def __init__(self, size: int = 64):
+        self._slots: List[Optional[dict]] = [None] * size
+        self._size = size
+        self._write_idx = 0  # Advanced only by the producer
+        self._read_idx = 0   # Advanced only by the consumer
+    
+    def push(self, command: dict) -> bool:
+        """Add a command; returns False if the ring is full"""
+        if self._write_idx - self._read_idx >= self._size:
+            return False
+        self._slots[self._write_idx % self._size] = command
+        self._write_idx += 1  # Publish only after the slot is written
+        return True
+    
+    def pop(self) -> Optional[dict]:
+        """Take the oldest command, or None if the ring is empty"""
+        if self._read_idx == self._write_idx:
+            return None
+        slot = self._read_idx % self._size
+        command = self._slots[slot]
+        self._slots[slot] = None
+        self._read_idx += 1
+        return command
+    
+    def drain(self) -> List[dict]:
+        """Take every queued command, reading the producer's index only once"""
+        end = self._write_idx
+        commands = []
+        for idx in range(self._read_idx, end):
+            slot = idx % self._size
+            commands.append(self._slots[slot])
+            self._slots[slot] = None
+        self._read_idx = end
+        return commands
 
 class StemLibrary:
     """Library of all available stems from all songs"""
@@ -51,23 +277,43 @@ class StemLibrary:
             'bass': [], 'drums': [], 'vocals': [], 'piano': [], 'other': []
         }
         self.song_stems: Dict[str, Dict[str, StemInfo]] = {}
+        self._dir_listings: Dict[str, Dict[str, str]] = {}
         self._build_library(songs)
+        
+        # Per stem type, each stem's wheel position and BPM for vectorized searches
+        self._key_indices = {stem_type: np.array([CamelotWheel.key_index(s.key) for s in stem_list], dtype=np.intp)
+                             for stem_type, stem_list in self.stems.items()}
+        self._bpms = {stem_type: np.array([s.bpm for s in stem_list], dtype=np.float64)
+                      for stem_type, stem_list in self.stems.items()}
+    
+    def _list_song_dir(self, song_dir: str) -> Dict[str, str]:
+        """Files in a song directory by name, from one scandir (memoized per directory)"""
+        listing = self._dir_listings.get(song_dir)
+        if listing is None:
+            try:
+                with os.scandir(song_dir) as entries:
+                    listing = {entry.name: entry.path for entry in entries if entry.is_file()}
+            except OSError:
+                listing = {}
+            self._dir_listings[song_dir] = listing
+        return listing
     
     def _build_library(self, songs: List[SongMetadata]):
         """Build library from all analyzed songs"""
         print("🏗️  Building stem library...")
         
         for song in songs:
-            song_dir = Path(song.path)
             self.song_stems[song.name] = {}
             
+            stem_files = self._list_song_dir(song.path)
+            
             for stem_type in self.stems.keys():
-                stem_file = song_dir / f"{stem_type}.wav"
-                if stem_file.exists():
+                stem_file = stem_files.get(f"{stem_type}.wav")
+                if stem_file:
                     stem_info = StemInfo(
                         song_name=song.name,
                         stem_type=stem_type,
-                        file_path=str(stem_file),
+                        file_path=stem_file,
                         bpm=song.bpm,
                         key=song.key,
                         duration=song.duration,
@@ -84,28 +330,21 @@ class StemLibrary:
     def find_compatible_stems(self, stem_type: str, target_key: str, target_bpm: float, 
                             max_key_distance: float = 0.5, max_bpm_ratio: float = 0.3) -> List[StemInfo]:
         """Find stems compatible with target key and BPM"""
-        compatible = []
+        stems = self.stems[stem_type]
+        if not stems:
+            return []
         
-        for stem in self.stems[stem_type]:
-            # Check key compatibility
-            key_dist = CamelotWheel.key_distance(stem.key, target_key)
-            if key_dist > max_key_distance:
-                continue
-                
-            # Check BPM compatibility
-            bpm_dist = BPMDistance.bpm_distance(stem.bpm, target_bpm)
-            if bpm_dist > max_bpm_ratio:
-                continue
-                
-            compatible.append(stem)
+        # Score every stem at once from the precomputed key distances
+        key_dist = CamelotWheel.distance_matrix()[self._key_indices[stem_type],
+                                                  CamelotWheel.key_index(target_key)]
+        bpm_dist = BPMDistance.bpm_distances(self._bpms[stem_type], target_bpm)
         
-        # Sort by compatibility (key + BPM)
-        compatible.sort(key=lambda s: (
-            CamelotWheel.key_distance(s.key, target_key) * 0.6 +
-            BPMDistance.bpm_distance(s.bpm, target_bpm) * 0.4
-        ))
+        # Check key and BPM compatibility
+        candidates = np.flatnonzero((key_dist <= max_key_distance) & (bpm_dist <= max_bpm_ratio))
         
-        return compatible
+        # Sort by compatibility (key + BPM)
+        scores = key_dist[candidates] * 0.6 + bpm_dist[candidates] * 0.4
+        return [stems[i] for i in candidates[np.argsort(scores, kind='stable')]]
     
     def get_stem_by_song(self, song_name: str, stem_type: str) -> Optional[StemInfo]:
         """Get specific stem from specific song"""
@@ -122,60 +361,144 @@ class StemLibrary:
 class RealTimeAudioProcessor:
     """Real-time audio processing for pitch and tempo adjustment"""
     
-    @staticmethod
-    def pitch_shift_audio(audio: np.ndarray, semitones: float, sr: int = 44100) -> np.ndarray:
-        """Pitch shift audio by semitones"""
-        if semitones == 0:
-            return audio
-        
-        # Use librosa for pitch shifting
-        if audio.ndim == 1:
-            shifted = librosa.effects.pitch_shift(audio, sr=sr, n_steps=semitones)
-            return np.stack([shifted, shifted]).T
-        else:
-            # Process each channel separately
-            left = librosa.effects.pitch_shift(audio[:, 0], sr=sr, n_steps=semitones)
-            right = librosa.effects.pitch_shift(audio[:, 1], sr=sr, n_steps=semitones)
-            return np.stack([left, right]).T
+    def __init__(self, n_fft: int = 1024, hop_length: int = 256):
+        # STFT size for the playback time stretch: ~23ms at 44.1kHz, plenty for mixing and
+        # roughly half the FFT cost of librosa's 2048 default
+        self.n_fft = n_fft
+        self.hop_length = hop_length
     
     @staticmethod
-    def time_stretch_audio(audio: np.ndarray, ratio: float) -> np.ndarray:
-        """Time stretch audio by ratio (1.0 = no change, 2.0 = double speed)"""
-        if ratio == 1.0:
-            return audio
-        
-        if audio.ndim == 1:
-            stretched = librosa.effects.time_stretch(audio, rate=ratio)
-            return np.stack([stretched, stretched]).T
-        else:
-            # Process each channel separately  
-            left = librosa.effects.time_stretch(audio[:, 0], rate=ratio)
-            right = librosa.effects.time_stretch(audio[:, 1], rate=ratio)
-            return np.stack([left, right]).T
+    def semitone_ratio(semitones: float) -> float:
+        """Frequency ratio of a pitch shift"""
+        return SEMITONE_RATIOS.get(semitones) or 2.0 ** (semitones / 12.0)
+    
+    @classmethod
+    def resample_pitch_shift(cls, audio: np.ndarray, semitones: float, sr: int = 44100) -> np.ndarray:
+        """Shift (samples, channels) audio by semitones with a single resample
+        
+        Played back at sr the result is pitched up by semitones but also shorter by
+        semitone_ratio(semitones); time stretching it by the inverse restores the
+        duration. No STFT is involved, so the length fix can be folded into the
+        playback stretch.
+        """
+        target_sr = int(round(sr / cls.semitone_ratio(semitones)))
+        return librosa.resample(audio, orig_sr=sr, target_sr=target_sr, axis=0)
     
     @staticmethod
     def calculate_pitch_shift_for_key(from_key: str, to_key: str) -> float:
         """Calculate pitch shift in semitones to go from one key to another"""
-        if from_key == to_key:
-            return 0.0
-        
-        # Simplified key to semitone mapping (Camelot wheel)
-        key_to_semitone = {
-            '1A': 0, '1B': 3, '2A': 7, '2B': 10, '3A': 2, '3B': 5,
-            '4A': 9, '4B': 0, '5A': 4, '5B': 7, '6A': 11, '6B': 2,
-            '7A': 6, '7B': 9, '8A': 1, '8B': 4, '9A': 8, '9B': 11,
-            '10A': 3, '10B': 6, '11A': 10, '11B': 1, '12A': 5, '12B': 8
-        }
-        
-        from_semitone = key_to_semitone.get(from_key, 0)
-        to_semitone = key_to_semitone.get(to_key, 0)
-        
-        # Calculate shortest path (considering octave wrapping)
-        diff = (to_semitone - from_semitone) % 12
-        if diff > 6:
-            diff -= 12
-            
-        return diff
+        return float(KEY_SHIFT_TABLE[CamelotWheel.key_index(from_key), CamelotWheel.key_index(to_key)])
+
+class StemVariantCache:
+    """Decoded and pitch shifted stems, kept in memory and on disk
+    
+    Processing is a pure function of the source file and the adjustments, so
+    toggling between targets, or a later session, reuses the earlier result. Disk
+    entries are memory-mapped .npy files keyed on the file's size and mtime too,
+    so an edited stem is never served stale. The directory is kept under
+    max_disk_bytes by dropping the entries used longest ago.
+    """
+    
+    def __init__(self, cache_dir: Optional[str] = "~/.tsp_cache", max_items: int = 32,
+                 max_disk_bytes: int = STEM_CACHE_MAX_BYTES):
+        self.cache_dir = Path(cache_dir).expanduser() if cache_dir else None
+        self.max_items = max_items
+        self.max_disk_bytes = max_disk_bytes
+        self._items: "OrderedDict[tuple, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()  # Swap worker and background decoders both store entries
+    
+    @staticmethod
+    def make_key(file_path: str, semitones: float, sample_rate: int, settings: tuple = ()) -> tuple:
+        """Cache key for one processed variant of a stem file (settings: processing parameters)"""
+        return (file_path, round(semitones, 2), sample_rate) + tuple(settings)
+    
+    def _disk_path(self, key: tuple) -> Optional[Path]:
+        if self.cache_dir is None:
+            return None
+        try:
+            st = os.stat(key[0])
+        except OSError:
+            return None
+        digest = hashlib.sha1(repr((os.path.abspath(key[0]), st.st_size, st.st_mtime_ns) + key[1:]).encode())
+        return self.cache_dir / f"{digest.hexdigest()}.npy"
+    
+    def get(self, key: tuple) -> Optional[np.ndarray]:
+        """Processed audio for key, or None if it was never computed"""
+        with self._lock:
+            audio = self._items.get(key)
+            if audio is not None:
+                self._items.move_to_end(key)
+                return audio
+        
+        disk_path = self._disk_path(key)
+        if disk_path is None or not disk_path.exists():
+            return None
+        try:
+            audio = np.load(disk_path, mmap_mode='r')
+            os.utime(disk_path)  # Mark as recently used for _trim_disk
+        except (OSError, ValueError):
+            return None
+        self._remember(key, audio)
+        return audio
+    
+    def put(self, key: tuple, audio: np.ndarray):
+        """Store processed audio for key
+        
+        Once the entry is on disk the in-memory LRU keeps a memory map of it rather
+        than the heap array, so cached stems don't stay resident.
+        """
+        disk_path = self._disk_path(key)
+        if disk_path is None:
+            self._remember(key, audio)
+            return
+        tmp_path = None
+        try:
+            disk_path.parent.mkdir(parents=True, exist_ok=True)
+            # A private temp file per writer, so concurrent puts of a key can't collide
+            with tempfile.NamedTemporaryFile(dir=disk_path.parent, suffix=".tmp", delete=False) as tmp:
+                tmp_path = tmp.name
+                np.save(tmp, audio)
+            os.replace(tmp_path, disk_path)  # Never leave a half-written entry
+            tmp_path = None
+            audio = np.load(disk_path, mmap_mode='r')
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Could not write stem cache: {e}")
+        finally:
+            if tmp_path is not None:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+        self._remember(key, audio)
+        self._trim_disk()
+    
+    def _trim_disk(self):
+        """Delete the least recently used entries until the directory fits max_disk_bytes"""
+        try:
+            files = []
+            with os.scandir(self.cache_dir) as entries:
+                for entry in entries:
+                    if entry.name.endswith(".npy") and entry.is_file():
+                        st = entry.stat()
+                        files.append((st.st_mtime, st.st_size, entry.path))
+        except OSError:
+            return
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.unlink(path)  # Stems already memory-mapped from it stay readable
+            except OSError:
+                pass
+            total -= size
+    
+    def _remember(self, key: tuple, audio: np.ndarray):
+        with self._lock:
+            self._items[key] = audio
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
 
 class InteractiveMixer:
     """Interactive mixer with real-time stem swapping"""
@@ -185,6 +508,23 @@ class InteractiveMixer:
         self.chunk_size = chunk_size
         self.audio = pyaudio.PyAudio()
         self.stream = None
+        self.running = False
+        self.audio_thread = None
+        
+        # Mix and scratch buffers reused for every chunk so the mixer loop doesn't allocate
+        self._mix_buf = np.zeros((chunk_size, 2), dtype=np.float32)
+        self._scratch = np.empty_like(self._mix_buf)
+        self._clip_buf = np.empty_like(self._mix_buf)
+        
+        # Mix state laid out per field rather than per stem, one slot per STEM_INDEX:
+        # this chunk's samples and valid length (0 = silent), and the stem's volume
+        # (folded with the int16 scale), kept up to date by volume commands and swaps
+        self._stage = np.zeros((len(STEM_TYPES), chunk_size, 2), dtype=np.int16)
+        self._stage_lengths = np.zeros(len(STEM_TYPES), dtype=np.int64)
+        self._stem_volumes = np.zeros(len(STEM_TYPES), dtype=np.float32)
+        if NUMBA_AVAILABLE:
+            # Compile now rather than on the first chunk of playback
+            _mix_kernel(self._mix_buf, self._stage, self._stage_lengths, self._stem_volumes, 1.0)
         
         # Active stems (one per type)
         self.active_stems: Dict[str, Optional[ActiveStem]] = {
@@ -196,44 +536,60 @@ class InteractiveMixer:
         self.is_playing = False
         self.master_volume = 0.8
         
-        # Threading and synchronization
-        self.audio_lock = Lock()
-        self.command_queue = queue.Queue()
+        # Commands from the CLI reach the mixer thread without locks
+        self.command_queue = CommandRing()
         self.current_song_info: Optional[SongMetadata] = None
         
-        # Processing
+        # Processing; stem loading and pitch/tempo changes run on a worker thread
+        # so a swap never stalls the mixer loop
         self.processor = RealTimeAudioProcessor()
+        self.variant_cache = StemVariantCache()
+        self._swap_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="stem-swap")
+        self._pending_swaps: List[Tuple[str, Future]] = []  # Owned by the mixer thread
     
     def setup_stream(self) -> bool:
-        """Initialize audio output stream"""
+        """Initialize audio output stream (blocking writes fed by a mixer thread)"""
         try:
             self.stream = self.audio.open(
                 format=pyaudio.paFloat32,
                 channels=2,
                 rate=self.sample_rate,
                 output=True,
-                frames_per_buffer=self.chunk_size,
-                stream_callback=self._audio_callback
+                frames_per_buffer=self.chunk_size
             )
-            return True
         except Exception as e:
             print(f"❌ Audio setup error: {e}")
             return False
+        
+        # Mix in a regular Python thread instead of a PortAudio callback, so the
+        # GIL, locks and numpy work never run on the realtime audio thread
+        self.running = True
+        self.audio_thread = Thread(target=self._audio_loop, daemon=True)
+        self.audio_thread.start()
+        return True
     
-    def _audio_callback(self, in_data, frame_count, time_info, status):
-        """Real-time audio callback with stem mixing"""
-        with self.audio_lock:
+    def _audio_loop(self):
+        """Mixer loop: mix one chunk and block writing it to the stream"""
+        while self.running:
+            if not self.is_playing:
+                time.sleep(0.01)
+                continue
+            
             try:
-                output = self._mix_stems(frame_count)
-                self.playback_position += frame_count
-                return (output.tobytes(), pyaudio.paContinue)
+                output = self._mix_stems(self.chunk_size)
+                self.playback_position += self.chunk_size
+                # write() blocks until PortAudio has room, which paces the loop
+                self.stream.write(output.tobytes())
             except Exception as e:
-                print(f"⚠️  Audio callback error: {e}")
-                return (np.zeros((frame_count, 2), dtype=np.float32).tobytes(), pyaudio.paContinue)
+                if self.is_playing:
+                    print(f"⚠️  Audio loop error: {e}")
+                    time.sleep(0.1)
     
     def _mix_stems(self, frame_count: int) -> np.ndarray:
-        """Mix all active stems into output buffer"""
-        output = np.zeros((frame_count, 2), dtype=np.float32)
+        """Mix all active stems into the shared output buffer"""
+        output = self._mix_buf[:frame_count]
+        scratch = self._scratch
+        output.fill(0.0)
         
         if not self.is_playing:
             return output
@@ -241,7 +597,10 @@ class InteractiveMixer:
         # Process command queue
         self._process_commands()
         
-        # Mix each active stem
+        # Stage each active stem's chunk in its slot (one consistent snapshot even
+        # if a swap is published)
+        lengths = self._stage_lengths
+        lengths.fill(0)
         for stem_type, active_stem in self.active_stems.items():
             if active_stem is None:
                 continue
@@ -249,55 +608,86 @@ class InteractiveMixer:
             try:
                 # Get audio chunk from stem
                 stem_chunk = self._get_stem_chunk(active_stem, frame_count)
-                if stem_chunk is not None:
-                    # Apply volume and mix
-                    output += stem_chunk * active_stem.volume
+                if stem_chunk is None:
+                    continue
+                
+                # A stem that is ending only covers the first rows
+                slot = STEM_INDEX[stem_type]
+                n = len(stem_chunk)
+                self._stage[slot, :n] = stem_chunk
+                lengths[slot] = n
+                if not NUMBA_AVAILABLE and n < frame_count:
+                    self._stage[slot, n:frame_count] = 0
             except Exception as e:
                 print(f"⚠️  Error mixing {stem_type}: {e}")
         
-        # Apply master volume and soft limiting
-        output *= self.master_volume
-        output = np.tanh(output * 0.95) * 0.95
+        # Apply volumes, master volume and soft limiting in place. The returned buffer
+        # is reused next chunk, so callers must copy it out (tobytes) before then
+        if NUMBA_AVAILABLE:
+            _mix_kernel(output, self._stage, lengths, self._stem_volumes, self.master_volume * 0.95)
+        else:
+            # Weighted sum over the stem axis; silent slots get a zero weight
+            weights = np.where(lengths > 0, self._stem_volumes, np.float32(0.0))
+            np.einsum('k,kij->ij', weights, self._stage[:, :frame_count], out=output, casting='same_kind')
+            # Same clamped Padé soft clip as _soft_clip, vectorized in place
+            output *= self.master_volume * 0.95
+            np.clip(output, -3.0, 3.0, out=output)
+            numerator = np.multiply(output, output, out=scratch[:frame_count])
+            denominator = np.multiply(numerator, 9.0, out=self._clip_buf[:frame_count])
+            numerator += 27.0
+            denominator += 27.0
+            output *= numerator
+            output /= denominator
+            output *= 0.95
         
         return output
     
     def _get_stem_chunk(self, active_stem: ActiveStem, frame_count: int) -> Optional[np.ndarray]:
-        """Get audio chunk from active stem with position tracking"""
-        audio_data = active_stem.audio_data
-        
-        if self.playback_position >= len(audio_data):
-            return None
+        """Get audio chunk from active stem with position tracking
         
-        end_pos = min(self.playback_position + frame_count, len(audio_data))
-        chunk = audio_data[self.playback_position:end_pos]
+        Returns a view that is shorter than frame_count when the stem ends mid-chunk.
+        """
+        # Streamed stems are only read up to what the decoder has filled in
+        available = active_stem.decoded_frames
+        if active_stem.stretcher is not None:
+            return active_stem.stretcher.read(active_stem.audio_data, available,
+                                              self.playback_position, frame_count)
         
-        # Pad with zeros if needed
-        if len(chunk) < frame_count:
-            padding = np.zeros((frame_count - len(chunk), 2), dtype=np.float32)
-            chunk = np.vstack([chunk, padding])
+        if self.playback_position >= available:
+            return None
         
-        return chunk
+        end_pos = min(self.playback_position + frame_count, available)
+        return active_stem.audio_data[self.playback_position:end_pos]
     
     def _process_commands(self):
-        """Process queued commands"""
-        while not self.command_queue.empty():
-            try:
-                command = self.command_queue.get_nowait()
-                self._execute_command(command)
-            except queue.Empty:
-                break
+        """Process queued commands and publish swaps the worker has finished"""
+        for command in self.command_queue.drain():
+            self._execute_command(command)
+        
+        if self._pending_swaps:
+            self._publish_finished_swaps()
+    
+    def _publish_finished_swaps(self):
+        """Swap in stems whose processing is done, in the order they were requested"""
+        while self._pending_swaps and self._pending_swaps[0][1].done():
+            stem_type, future = self._pending_swaps.pop(0)
+            active_stem = future.result()
+            if active_stem is not None:
+                self._publish_stem(stem_type, active_stem)
     
     def _execute_command(self, command: dict):
         """Execute a mixer command"""
         cmd_type = command.get('type')
         
         if cmd_type == 'swap_stem':
-            self._swap_stem(
+            future = self._swap_executor.submit(
+                self._prepare_stem,
                 command['stem_type'],
                 command['stem_info'],
                 command.get('target_key'),
                 command.get('target_bpm')
             )
+            self._pending_swaps.append((command['stem_type'], future))
         elif cmd_type == 'set_volume':
             self._set_stem_volume(command['stem_type'], command['volume'])
         elif cmd_type == 'mute_stem':
@@ -306,20 +696,15 @@ class InteractiveMixer:
             self._unmute_stem(command['stem_type'])
     
     def _swap_stem(self, stem_type: str, stem_info: StemInfo, target_key: str = None, target_bpm: float = None):
-        """Swap active stem with new one"""
+        """Swap active stem with new one (blocking)"""
+        active_stem = self._prepare_stem(stem_type, stem_info, target_key, target_bpm)
+        if active_stem is not None:
+            self._publish_stem(stem_type, active_stem)
+    
+    def _prepare_stem(self, stem_type: str, stem_info: StemInfo, target_key: str = None,
+                      target_bpm: float = None) -> Optional[ActiveStem]:
+        """Load a stem and match it to the target key/BPM, ready to be swapped in"""
         try:
-            # Load new stem audio
-            audio, sr = librosa.load(stem_info.file_path, sr=self.sample_rate, mono=False)
-            
-            # Ensure stereo
-            if audio.ndim == 1:
-                audio = np.stack([audio, audio])
-            elif audio.shape[0] == 1:
-                audio = np.vstack([audio, audio])
-            
-            # Transpose to (samples, channels)
-            audio = audio.T.astype(np.float32)
-            
             # Calculate adjustments
             target_key = target_key or (self.current_song_info.key if self.current_song_info else stem_info.key)
             target_bpm = target_bpm or (self.current_song_info.bpm if self.current_song_info else stem_info.bpm)
@@ -327,13 +712,38 @@ class InteractiveMixer:
             pitch_shift = self.processor.calculate_pitch_shift_for_key(stem_info.key, target_key)
             tempo_ratio = target_bpm / stem_info.bpm if stem_info.bpm > 0 else 1.0
             
-            # Apply pitch shift
-            if pitch_shift != 0:
-                audio = self.processor.pitch_shift_audio(audio, pitch_shift, sr)
+            # Pitch shifts are a plain resample whose change of length is undone by
+            # the playback stretch, along with the tempo change
+            stretch_rate = tempo_ratio / self.processor.semitone_ratio(pitch_shift)
+            
+            # Reuse an earlier pitch shift, or decode, of this stem if there is one
+            # (memory-mapped from disk). Tempo is matched lazily during playback, so
+            # it doesn't need processing here
+            needs_processing = pitch_shift != 0
+            settings = ('resample', 'int16') if needs_processing else ('decoded', 'int16')
+            cache_key = self.variant_cache.make_key(stem_info.file_path, pitch_shift, self.sample_rate, settings)
+            audio = self.variant_cache.get(cache_key)
             
-            # Apply time stretch
-            if tempo_ratio != 1.0:
-                audio = self.processor.time_stretch_audio(audio, tempo_ratio)
+            stream = None
+            decoded_frames = -1
+            if audio is None and not needs_processing:
+                # Playable as-is: decode the start now and the rest in the background,
+                # which caches the decoded stem once it is complete
+                audio, decoded_frames, stream = self._open_stem_stream(stem_info.file_path)
+                if audio is not None and stream is None:
+                    self.variant_cache.put(cache_key, audio)
+            
+            if audio is None:
+                # Load new stem audio, decoded in full
+                decoded_frames = -1
+                audio = self._read_stem_audio(stem_info.file_path)
+                
+                # Apply pitch shift
+                if needs_processing:
+                    audio = self.processor.resample_pitch_shift(audio, pitch_shift, self.sample_rate)
+                
+                audio = self._to_int16(audio)
+                self.variant_cache.put(cache_key, audio)
             
             # Create active stem
             active_stem = ActiveStem(
@@ -344,40 +754,129 @@ class InteractiveMixer:
                 original_key=stem_info.key,
                 target_key=target_key,
                 pitch_shift=pitch_shift,
-                tempo_ratio=tempo_ratio
+                tempo_ratio=tempo_ratio,
+                decoded_frames=decoded_frames,
+                stretcher=(StreamingTimeStretch(stretch_rate, self.processor.n_fft, self.processor.hop_length)
+                           if stretch_rate != 1.0 else None)
             )
-            
-            # Replace active stem
-            self.active_stems[stem_type] = active_stem
-            
-            print(f"🔄 Swapped {stem_type}: {stem_info.song_name}")
-            print(f"   Key: {stem_info.key} → {target_key} ({pitch_shift:+.1f} semitones)")
-            print(f"   BPM: {stem_info.bpm:.1f} → {target_bpm:.1f} ({tempo_ratio:.2f}x)")
+            if stream is not None:
+                Thread(target=self._decode_rest, args=(stream, active_stem, cache_key), daemon=True).start()
+            return active_stem
             
         except Exception as e:
             print(f"❌ Error swapping {stem_type}: {e}")
+            return None
+    
+    @staticmethod
+    def _to_int16(audio: np.ndarray) -> np.ndarray:
+        """Quantize (samples, 1 or 2) float audio to int16 stereo storage for mixing
+        
+        Mono is duplicated to both channels only here, by broadcasting into the
+        one int16 array that gets allocated.
+        """
+        scaled = np.clip(audio, -1.0, 1.0)
+        scaled *= 32767.0
+        stereo = np.empty((len(audio), 2), dtype=np.int16)
+        np.copyto(stereo, scaled, casting='unsafe')
+        return stereo
+    
+    def _read_stem_audio(self, file_path: str) -> np.ndarray:
+        """Decode a whole stem as (samples, 1 or 2) float32 at the mixer rate, for processing"""
+        audio, sr = sf.read(file_path, dtype='float32', always_2d=True)
+        if sr != self.sample_rate:
+            # Resample along the time axis of the (samples, channels) array directly,
+            # avoiding librosa.load's channel-first layout
+            audio = librosa.resample(audio, orig_sr=sr, target_sr=self.sample_rate, axis=0)
+        
+        # Mono stays one channel, so pitch/tempo processing does half the work;
+        # _to_int16 duplicates it to stereo at the end
+        return audio[:, :2]
+    
+    def _open_stem_stream(self, file_path: str) -> Tuple[Optional[np.ndarray], int, Optional[sf.SoundFile]]:
+        """Decode the first STREAM_PRELOAD_SECONDS of a stem into a full-size buffer
+        
+        Returns (buffer, frames decoded, open file to finish decoding from), or
+        (None, -1, None) if the file has to be resampled and can't be streamed.
+        """
+        stream = sf.SoundFile(file_path)
+        if stream.samplerate != self.sample_rate:
+            stream.close()
+            return None, -1, None
+        
+        audio = np.empty((stream.frames, 2), dtype=np.int16)
+        # Read as float and quantize ourselves: libsndfile doesn't rescale float
+        # files when asked for int16 directly
+        head = stream.read(min(stream.frames, int(STREAM_PRELOAD_SECONDS * self.sample_rate)),
+                           dtype='float32', always_2d=True)
+        audio[:len(head)] = self._to_int16(head[:, :2])  # Mono broadcasts to both channels
+        if len(head) >= stream.frames:
+            stream.close()
+            return audio, len(head), None
+        return audio, len(head), stream
+    
+    def _decode_rest(self, stream: sf.SoundFile, active_stem: ActiveStem, cache_key: tuple):
+        """Background decoder: fill the rest of a streamed stem block by block, then cache it"""
+        audio = active_stem.audio_data
+        position = active_stem.decoded_frames
+        try:
+            with stream:
+                while position < len(audio):
+                    block = stream.read(min(STREAM_BLOCK_FRAMES, len(audio) - position),
+                                        dtype='float32', always_2d=True)
+                    if not len(block):
+                        break
+                    audio[position:position + len(block)] = self._to_int16(block[:, :2])
+                    position += len(block)
+                    # Published only after the samples are written
+                    active_stem.decoded_frames = position
+            if position == len(audio):
+                self.variant_cache.put(cache_key, audio)
+        except Exception as e:
+            print(f"⚠️  Error decoding {active_stem.stem_info.song_name} {active_stem.stem_info.stem_type}: {e}")
+    
+    def _publish_stem(self, stem_type: str, active_stem: ActiveStem):
+        """Make a prepared stem the active one for its type"""
+        # Publish a new stems dict in one reference assignment, so the mixer
+        # thread sees either the old set of stems or the new one
+        self.active_stems = {**self.active_stems, stem_type: active_stem}
+        self._sync_stem_volume(stem_type)
+        
+        stem_info = active_stem.stem_info
+        print(f"🔄 Swapped {stem_type}: {stem_info.song_name}")
+        print(f"   Key: {stem_info.key} → {active_stem.target_key} ({active_stem.pitch_shift:+.1f} semitones)")
+        print(f"   BPM: {stem_info.bpm:.1f} → {active_stem.target_bpm:.1f} ({active_stem.tempo_ratio:.2f}x)")
+    
+    def _sync_stem_volume(self, stem_type: str):
+        """Copy a stem's volume into the mixer's per-slot volume array"""
+        active_stem = self.active_stems[stem_type]
+        self._stem_volumes[STEM_INDEX[stem_type]] = (active_stem.volume * INT16_TO_FLOAT
+                                                     if active_stem else 0.0)
     
     def _set_stem_volume(self, stem_type: str, volume: float):
         """Set volume for specific stem"""
         if self.active_stems[stem_type]:
             self.active_stems[stem_type].volume = max(0.0, min(2.0, volume))
+            self._sync_stem_volume(stem_type)
             print(f"🔊 {stem_type.upper()} volume: {volume:.2f}")
     
     def _mute_stem(self, stem_type: str):
         """Mute specific stem"""
         if self.active_stems[stem_type]:
             self.active_stems[stem_type].volume = 0.0
+            self._sync_stem_volume(stem_type)
             print(f"🔇 {stem_type.upper()} muted")
     
     def _unmute_stem(self, stem_type: str):
         """Unmute specific stem"""
         if self.active_stems[stem_type]:
             self.active_stems[stem_type].volume = 1.0
+            self._sync_stem_volume(stem_type)
             print(f"🔊 {stem_type.upper()} unmuted")
     
     def queue_command(self, command: dict):
         """Queue command for execution in audio thread"""
-        self.command_queue.put(command)
+        if not self.command_queue.push(command):
+            print(f"⚠️  Command queue full, dropping {command.get('type')}")
     
     def load_song(self, song: SongMetadata, stem_library: StemLibrary):
         """Load all stems of a song"""
@@ -420,6 +919,10 @@ class InteractiveMixer:
     def cleanup(self):
         """Cleanup audio resources"""
         self.stop_playback()
+        self.running = False
+        if self.audio_thread:
+            self.audio_thread.join(timeout=1.0)
+        self._swap_executor.shutdown(wait=False)
         if self.stream:
             self.stream.close()
         self.audio.terminate()
@@ -54,6 +54,8 @@ class SmartSuperColliderStemMixer:
         # Smart loading state
         self.available_songs = []
         self.song_structures = {}
+        self.country_index: Dict[str, List[int]] = {}  # Country -> song indices, load order
+        self._id_cache: Dict[str, Optional[int]] = {}  # Identifier -> song index lookups
         self.loaded_buffers = set()        # Track what's loaded in SuperCollider
         self.playing_stems = set()         # Track what's currently playing
         self.deck_a_stems = {}             # Current deck A configuration
@@ -104,7 +106,17 @@ class SmartSuperColliderStemMixer:
         return song_name.lower()
     
     def _find_song_by_identifier(self, identifier: str) -> Optional[int]:
-        """Find song by country name or numerical ID"""
+        """Find song by country name or numerical ID (memoized)"""
+        cache_key = identifier.lower().strip()
+        if cache_key in self._id_cache:
+            return self._id_cache[cache_key]
+        
+        song_index = self._resolve_song_identifier(identifier)
+        self._id_cache[cache_key] = song_index
+        return song_index
+    
+    def _resolve_song_identifier(self, identifier: str) -> Optional[int]:
+        """Scan available songs for a country name or numerical ID"""
         # Try numerical ID first
         try:
             song_id = int(identifier)
@@ -117,14 +129,13 @@ class SmartSuperColliderStemMixer:
         identifier_lower = identifier.lower().strip()
         
         # First pass: exact country name match
-        for i, song in enumerate(self.available_songs):
-            country = self._extract_country_name(song['name'])
-            if country == identifier_lower:
-                return i
+        song_indices = self.country_index.get(identifier_lower)
+        if song_indices:
+            return song_indices[0]
         
         # Second pass: partial country name match
         for i, song in enumerate(self.available_songs):
-            country = self._extract_country_name(song['name'])
+            country = song['country']
             if identifier_lower in country or country.startswith(identifier_lower):
                 return i
         
@@ -137,6 +148,10 @@ class SmartSuperColliderStemMixer:
     
     def _load_song_info(self):
         """Load song and structure information (metadata only)"""
+        # Cached identifier lookups refer to the old song list
+        self._id_cache.clear()
+        self.country_index.clear()
+        
         # Load structure JSON files
         if self.structures_dir.exists():
             for json_file in self.structures_dir.glob("*.json"):
@@ -194,6 +209,7 @@ class SmartSuperColliderStemMixer:
                             'sections': sections
                         }
                         
+                        self.country_index.setdefault(country_name, []).append(len(self.available_songs))
                         self.available_songs.append(song_data)
                         
                         section_labels = list(set(s['label'] for s in sections)) if sections else []
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Test Interactive Mixer stem loading
+Checks that a prepared stem is playable whether or not it has to be resampled
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import soundfile as sf
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from interactive_tsp_mixer import InteractiveMixer, StemInfo, StemVariantCache
+
+def _prepare_bass(file_rate: int, mixer_rate: int = 44100):
+    """Write a one second stem at file_rate and prepare it on a mixer running at mixer_rate"""
+    with tempfile.TemporaryDirectory() as song_dir:
+        stem_path = os.path.join(song_dir, "bass.wav")
+        t = np.arange(file_rate) / file_rate
+        sf.write(stem_path, 0.3 * np.sin(2 * np.pi * 110 * t), file_rate)
+
+        stem_info = StemInfo(song_name="test_song", stem_type="bass", file_path=stem_path,
+                             bpm=120.0, key="8A", duration=1.0, energy=0.5)
+        mixer = InteractiveMixer(sample_rate=mixer_rate)
+        mixer.variant_cache = StemVariantCache(cache_dir=None)
+        try:
+            active_stem = mixer._prepare_stem("bass", stem_info, "8A", 120.0)
+            # Let a background decoder, if any, finish before the file goes away
+            deadline = time.time() + 5.0
+            while 0 <= active_stem.decoded_frames < len(active_stem.audio_data) and time.time() < deadline:
+                time.sleep(0.01)
+            return mixer, active_stem
+        finally:
+            mixer.cleanup()
+
+def test_matching_sample_rate_stem_plays():
+    """A stem at the mixer rate is streamed and returns audio"""
+    mixer, active_stem = _prepare_bass(44100)
+    assert active_stem.decoded_frames == len(active_stem.audio_data) == 44100
+    chunk = mixer._get_stem_chunk(active_stem, mixer.chunk_size)
+    assert chunk is not None and np.abs(chunk).max() > 0
+    print("✅ Matching sample rate stem plays")
+
+def test_mismatched_sample_rate_stem_plays():
+    """A stem at another rate is resampled in full and must not be left silent"""
+    mixer, active_stem = _prepare_bass(48000)
+    assert active_stem.decoded_frames == len(active_stem.audio_data)
+    assert abs(len(active_stem.audio_data) - 44100) <= 1
+    chunk = mixer._get_stem_chunk(active_stem, mixer.chunk_size)
+    assert chunk is not None and np.abs(chunk).max() > 0
+    print("✅ Mismatched sample rate stem plays")
+
+if __name__ == "__main__":
+    test_matching_sample_rate_stem_plays()
+    test_mismatched_sample_rate_stem_plays()
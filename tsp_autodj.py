@@ -78,6 +78,29 @@ class CamelotWheel:
         
         return min(normalized_dist, 1.0)
     
+    # Index used for keys outside the wheel in distance_matrix()
+    UNKNOWN_KEY_INDEX = len(WHEEL_POSITIONS)
+    _distance_matrix: Optional[np.ndarray] = None
+    
+    @classmethod
+    def distance_matrix(cls) -> np.ndarray:
+        """
+        key_distance for every pair of wheel positions, built once
+        Row/column UNKNOWN_KEY_INDEX stands for any key not on the wheel (distance 1.0)
+        """
+        if cls._distance_matrix is None:
+            matrix = np.ones((cls.UNKNOWN_KEY_INDEX + 1, cls.UNKNOWN_KEY_INDEX + 1))
+            for key1, pos1 in cls.WHEEL_POSITIONS.items():
+                for key2, pos2 in cls.WHEEL_POSITIONS.items():
+                    matrix[pos1, pos2] = cls.key_distance(key1, key2)
+            cls._distance_matrix = matrix
+        return cls._distance_matrix
+    
+    @classmethod
+    def key_index(cls, key: str) -> int:
+        """Row of distance_matrix() for a key"""
+        return cls.WHEEL_POSITIONS.get(key, cls.UNKNOWN_KEY_INDEX)
+    
     @classmethod
     def get_compatible_keys(cls, key: str, max_distance: float = 0.3) -> List[str]:
         """Get list of harmonically compatible keys within distance threshold"""
@@ -153,6 +176,26 @@ class BPMDistance:
                 
         return best_distance
     
+    @staticmethod
+    def bpm_distances(bpms: np.ndarray, target_bpm: float, harmonic_threshold: float = 0.08) -> np.ndarray:
+        """bpm_distance of every BPM in an array against one target, vectorized"""
+        bpms = np.asarray(bpms, dtype=np.float64)
+        if target_bpm == 0:
+            return np.ones_like(bpms)
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratio = np.maximum(bpms, target_bpm) / np.minimum(bpms, target_bpm)
+            
+            harmonic_ratios = np.array([2.0, 1.5, 4/3, 3/4, 2/3, 0.5])
+            ratio_error = np.abs((bpms / target_bpm)[:, None] - harmonic_ratios) / harmonic_ratios
+            harmonic = np.where(ratio_error <= harmonic_threshold,
+                                ratio_error / harmonic_threshold, 1.0).min(axis=1, initial=1.0)
+            
+            distances = np.where(ratio - 1.0 <= harmonic_threshold,
+                                 (ratio - 1.0) / harmonic_threshold, harmonic)
+        distances[bpms == 0] = 1.0
+        return distances
+    
     @staticmethod
     def tempo_adjustment_factor(bpm1: float, bpm2: float) -> float:
         """Calculate tempo adjustment factor needed for mixing"""